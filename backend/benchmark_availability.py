@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos filtros de disponibilidade (e-mail/username) sem banco
+
+Monta o filtro com N e-mails sintéticos e mede a latência da checagem e a taxa
+de falsos positivos (checagens que ainda iriam ao banco) para valores livres.
+
+Uso: python benchmark_availability.py --users 1000000 --checks 200000
+"""
+import argparse
+import time
+
+from core.config import AVAILABILITY_FILTER_FALSE_POSITIVE_RATE
+from utils.availability import TakenNames
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    names = TakenNames()
+    print(f"🔧 Montando filtros com {args.users} usuários...")
+    started = time.perf_counter()
+    names.build(((f"user{i}@example.com", f"user{i}") for i in range(args.users)), args.users, AVAILABILITY_FILTER_FALSE_POSITIVE_RATE)
+    print(f"✅ {time.perf_counter() - started:.1f}s, {names.memory_bytes() / 2**20:.1f}MB")
+
+    free = [f"new{i}@example.com" for i in range(args.checks)]
+    started = time.perf_counter()
+    hits = sum(1 for email in free if names.might_have_email(email))
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ {elapsed / args.checks * 1e6:.2f}µs por checagem; "
+          f"{hits / args.checks:.2%} dos e-mails livres ainda consultariam o banco")
+
+    taken = [f"User{i}@Example.com " for i in range(0, args.users, max(args.users // args.checks, 1))]
+    misses = sum(1 for email in taken if not names.might_have_email(email))
+    print(f"🔎 Falsos negativos (com caixa/espaços diferentes): {misses}")
+
+if __name__ == "__main__":
+    main()
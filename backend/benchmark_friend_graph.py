@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark do grafo de amizades em memória sobre um grafo sintético
+
+Não precisa do banco: gera arestas aleatórias com graus desbalanceados (alguns
+usuários com muitos amigos), mede a carga, a memória por milhão de arestas e a
+latência de are_friends, friends_of e degree, antes e depois de uma rodada de
+alterações incrementais.
+
+Uso: python benchmark_friend_graph.py --users 1000000 --avg-degree 20
+"""
+import argparse
+import random
+import time
+
+from utils.friend_graph import FriendGraph
+
+def synthetic_edges(users, avg_degree, rng):
+    for _ in range(users * avg_degree // 2):
+        # Metade das pontas vem de um grupo pequeno de usuários populares
+        user_id = rng.randint(1, users)
+        other_id = rng.randint(1, users // 100 or 1) if rng.random() < 0.5 else rng.randint(1, users)
+        yield user_id, other_id
+
+def per_op_ns(func, samples):
+    started = time.perf_counter()
+    for sample in samples:
+        func(*sample)
+    return (time.perf_counter() - started) / len(samples) * 1e9
+
+def report(graph, users, rng, label):
+    pairs = [(rng.randint(1, users), rng.randint(1, users)) for _ in range(200000)]
+    nodes = [(rng.randint(1, users),) for _ in range(50000)]
+    print(f"⏱️ [{label}] are_friends={per_op_ns(graph.are_friends, pairs):.0f}ns "
+          f"degree={per_op_ns(graph.degree, nodes):.0f}ns "
+          f"friends_of={per_op_ns(graph.friends_of, nodes) / 1000:.1f}µs")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--avg-degree", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    graph = FriendGraph()
+
+    print(f"🔧 Construindo grafo com {args.users} usuários e grau médio {args.avg_degree}...")
+    started = time.perf_counter()
+    graph.build(synthetic_edges(args.users, args.avg_degree, rng))
+    elapsed = time.perf_counter() - started
+    per_million = graph.memory_bytes() / max(graph.edge_count, 1) * 1_000_000
+    print(f"✅ {graph.edge_count} amizades em {elapsed:.1f}s, {graph.memory_bytes() / 2**20:.1f}MB "
+          f"({per_million / 2**20:.1f}MB por milhão de arestas, offsets incluídos)")
+
+    report(graph, args.users, rng, "CSR")
+
+    for _ in range(args.changes):
+        user_id, other_id = rng.randint(1, args.users), rng.randint(1, args.users)
+        if rng.random() < 0.7:
+            graph.add_edge(user_id, other_id)
+        else:
+            graph.remove_edge(user_id, other_id)
+    report(graph, args.users, rng, f"CSR + delta de {graph.delta_size}")
+
+    started = time.perf_counter()
+    graph.compact()
+    print(f"🗜️ Compactação em {time.perf_counter() - started:.1f}s")
+    report(graph, args.users, rng, "compactado")
+
+if __name__ == "__main__":
+    main()
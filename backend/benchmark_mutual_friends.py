@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark de amigos em comum sobre usuários de grau alto
+
+Não precisa do banco: carrega o grafo sintético de benchmark_friend_graph.py
+e mede, para os usuários com mais amigos, a contagem de amigos em comum par a
+par, a versão em lote (uma página de usuários) e a checagem de amigo de amigo.
+
+Uso: python benchmark_mutual_friends.py --users 200000 --avg-degree 40 --page-size 20
+"""
+import argparse
+import random
+import time
+
+from benchmark_friend_graph import synthetic_edges
+from utils.friend_graph import friend_graph
+from utils.mutual_friends import mutual_count, mutual_counts, is_friend_of_friend
+
+def timed_ms(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--avg-degree", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--hubs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"🔧 Construindo grafo com {args.users} usuários e grau médio {args.avg_degree}...")
+    friend_graph.build(synthetic_edges(args.users, args.avg_degree, rng))
+
+    degrees = sorted(((friend_graph.degree(user_id), user_id) for user_id in range(1, args.users + 1)), reverse=True)
+    hubs = [user_id for _, user_id in degrees[:args.hubs]]
+    print(f"✅ {friend_graph.edge_count} amizades; graus dos {args.hubs} maiores: "
+          f"{degrees[0][0]} .. {degrees[args.hubs - 1][0]}")
+
+    pair_times, batch_times, fof_times = [], [], []
+    for viewer_id in hubs:
+        # Par hub x hub (pior caso: duas listas grandes)
+        other_id = rng.choice(hubs)
+        elapsed, _ = timed_ms(lambda: mutual_count(None, viewer_id, other_id), 20)
+        pair_times.append(elapsed)
+
+        # Página mista: hubs e usuários comuns
+        page = [rng.choice(hubs) if rng.random() < 0.3 else rng.randint(1, args.users) for _ in range(args.page_size)]
+        elapsed, _ = timed_ms(lambda: mutual_counts(None, viewer_id, page), 20)
+        batch_times.append(elapsed)
+
+        stranger = rng.randint(1, args.users)
+        elapsed, _ = timed_ms(lambda: is_friend_of_friend(None, viewer_id, stranger), 20)
+        fof_times.append(elapsed)
+
+    for label, values in (("par hub x hub", pair_times), (f"lote de {args.page_size}", batch_times), ("amigo de amigo", fof_times)):
+        values.sort()
+        print(f"⏱️ {label}: p50={values[len(values) // 2]:.3f}ms max={values[-1]:.3f}ms")
+
+if __name__ == "__main__":
+    main()
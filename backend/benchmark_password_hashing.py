@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark de logins (bcrypt) por núcleo: inline numa thread vs pool de processos
+
+Mede a vazão de verificações de senha e o maior atraso do event loop enquanto
+elas rodam (um "tick" de 10ms que deveria acordar no horário).
+
+Uso: python benchmark_password_hashing.py --logins 32 --workers 1,2,4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from core.hashing import PasswordHasher, pwd_context
+
+async def loop_lag(stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append(time.perf_counter() - started - 0.01)
+
+async def measure(label: str, logins: int, run_all, parallelism: int):
+    # Vazão por núcleo realmente disponível, não por thread/processo
+    cores = min(parallelism, os.cpu_count() or 1)
+    stop, lag = asyncio.Event(), []
+    probe = asyncio.create_task(loop_lag(stop, lag))
+    started = time.perf_counter()
+    await run_all()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    throughput = logins / elapsed
+    print(f"⏱️ {label}: {throughput:.1f} logins/s ({throughput / cores:.1f} por núcleo), "
+          f"atraso máximo do event loop {max(lag, default=0) * 1000:.0f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash("benchmark-password")
+    print(f"🔧 bcrypt com {pwd_context.handler('bcrypt').default_rounds} rounds, {args.logins} logins por rodada")
+
+    # Linha de base: verificação inline nas threads do servidor (como antes)
+    async def inline():
+        semaphore = asyncio.Semaphore(args.threads)
+        async def one():
+            async with semaphore:
+                await asyncio.to_thread(pwd_context.verify, "benchmark-password", hashed)
+        await asyncio.gather(*(one() for _ in range(args.logins)))
+    await measure(f"inline, {args.threads} threads", args.logins, inline, args.threads)
+
+    for workers in (int(value) for value in args.workers.split(",")):
+        hasher = PasswordHasher(workers, max_pending=args.logins)
+        hasher.start()
+        # Aquece os processos (spawn) antes de medir
+        await asyncio.gather(*(hasher.verify("benchmark-password", hashed) for _ in range(workers)))
+        await measure(
+            f"pool de {workers} processo(s)", args.logins,
+            lambda: asyncio.gather(*(hasher.verify("benchmark-password", hashed) for _ in range(args.logins))),
+            workers
+        )
+        print(f"   {hasher.stats()}")
+        hasher.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
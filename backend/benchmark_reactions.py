@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência das reações: muitos usuários reagindo ao mesmo post em paralelo
+
+Verifica que não surgem linhas duplicadas e que os contadores mantidos
+(reactions_count e o histograma por tipo) batem com a tabela de reações.
+
+Uso: python benchmark_reactions.py --users 2000 --ops 20000 --workers 24
+"""
+import argparse
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, insert
+
+from core.database import SessionLocal
+from models import User, Post, Reaction, PostReactionCount
+from utils.counters import post_counters, flush_post_counters
+from utils.reactions import upsert_reaction, delete_reaction
+
+REACTION_TYPES = ["like", "love", "haha", "wow", "sad", "angry", "care", "pride", "grateful", "celebrating"]
+
+def setup(user_count):
+    db = SessionLocal()
+    try:
+        tag = uuid.uuid4().hex[:8]
+        db.execute(insert(User), [
+            {
+                "first_name": "Bench",
+                "last_name": str(i),
+                "email": f"bench_{tag}_{i}@bench.local",
+                "password_hash": "x"
+            }
+            for i in range(user_count)
+        ])
+        db.commit()
+        user_ids = [row[0] for row in db.query(User.id).filter(User.email.like(f"bench_{tag}_%")).all()]
+
+        author = User(first_name="Bench", last_name="Author", email=f"bench_{tag}_author@bench.local", password_hash="x")
+        db.add(author)
+        db.commit()
+        post = Post(author_id=author.id, content="benchmark")
+        db.add(post)
+        db.commit()
+        return tag, post.id, user_ids
+    finally:
+        db.close()
+
+def toggle(post_id, user_id):
+    """One client action: react with a random type or remove the reaction"""
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        if random.random() < 0.8:
+            reaction_type = random.choice(REACTION_TYPES)
+            outcome, previous_type = upsert_reaction(db, post_id, user_id, reaction_type)
+            db.commit()
+            if outcome == "added":
+                post_counters.increment(post_id, "reactions_count")
+                post_counters.increment_reaction(post_id, reaction_type)
+            elif outcome == "updated":
+                post_counters.increment_reaction(post_id, previous_type, -1)
+                post_counters.increment_reaction(post_id, reaction_type)
+        else:
+            reaction_type = delete_reaction(db, post_id, user_id)
+            db.commit()
+            if reaction_type:
+                post_counters.increment(post_id, "reactions_count", -1)
+                post_counters.increment_reaction(post_id, reaction_type, -1)
+    finally:
+        db.close()
+    return time.perf_counter() - started
+
+def verify(post_id):
+    db = SessionLocal()
+    try:
+        duplicates = db.query(Reaction.user_id).filter(Reaction.post_id == post_id).group_by(
+            Reaction.user_id
+        ).having(func.count(Reaction.id) > 1).count()
+        actual = db.query(Reaction).filter(Reaction.post_id == post_id).count()
+        stored = db.query(Post.reactions_count).filter(Post.id == post_id).scalar()
+
+        truth = dict(db.query(Reaction.reaction_type, func.count(Reaction.id)).filter(
+            Reaction.post_id == post_id
+        ).group_by(Reaction.reaction_type).all())
+        histogram = {
+            row.reaction_type: row.count
+            for row in db.query(PostReactionCount).filter(PostReactionCount.post_id == post_id).all()
+            if row.count
+        }
+
+        print(f"{'✅' if duplicates == 0 else '❌'} Linhas duplicadas: {duplicates}")
+        print(f"{'✅' if actual == stored else '❌'} reactions_count: gravado={stored} real={actual}")
+        print(f"{'✅' if truth == histogram else '❌'} Histograma: gravado={histogram} real={truth}")
+        return duplicates == 0 and actual == stored and truth == histogram
+    finally:
+        db.close()
+
+def cleanup(tag, post_id):
+    db = SessionLocal()
+    try:
+        db.query(Reaction).filter(Reaction.post_id == post_id).delete()
+        db.query(PostReactionCount).filter(PostReactionCount.post_id == post_id).delete()
+        db.query(Post).filter(Post.id == post_id).delete()
+        db.query(User).filter(User.email.like(f"bench_{tag}_%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=24)
+    args = parser.parse_args()
+
+    print(f"🔧 Criando {args.users} usuários e um post...")
+    tag, post_id, user_ids = setup(args.users)
+
+    # Metade das operações são "toques duplos": o mesmo usuário duas vezes seguidas
+    actors = []
+    while len(actors) < args.ops:
+        user_id = random.choice(user_ids)
+        actors.extend([user_id, user_id])
+    actors = actors[:args.ops]
+
+    try:
+        print(f"🚀 {args.ops} operações com {args.workers} threads...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            latencies = sorted(pool.map(lambda user_id: toggle(post_id, user_id), actors))
+        elapsed = time.perf_counter() - started
+        flush_post_counters()
+
+        print(f"📈 Vazão: {args.ops / elapsed:.0f} ops/s em {elapsed:.2f}s")
+        print(f"⏱️ Latência p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+              f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+        ok = verify(post_id)
+    finally:
+        cleanup(tag, post_id)
+
+    if not ok:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark do índice de busca de usuários sobre uma tabela sintética
+
+Gera usuários em memória (não precisa do banco), constrói o índice e mede a
+latência de consultas de autocomplete: prefixos de 1 a 6 letras e buscas por
+nome + sobrenome.
+
+Uso: python benchmark_user_search.py --users 1000000 --queries 20000 --p99-ms 20
+"""
+import argparse
+import random
+import resource
+import time
+
+from utils.user_search import UserSearchIndex
+
+FIRST_NAMES = [
+    "Ana", "João", "Maria", "José", "Pedro", "Lucas", "Júlia", "Mariana", "Gabriel", "Rafael",
+    "Fernanda", "Carlos", "Beatriz", "Felipe", "Larissa", "Gustavo", "Camila", "Bruno", "Letícia", "André",
+    "Patrícia", "Rodrigo", "Amanda", "Thiago", "Vitória", "Diego", "Isabela", "Marcelo", "Aline", "Eduardo"
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas"
+]
+
+def synthetic_users(count, rng):
+    for user_id in range(1, count + 1):
+        first_name = rng.choice(FIRST_NAMES)
+        # Sobrenome com sufixo aleatório para ter um vocabulário realista (muitos tokens únicos)
+        last_name = f"{rng.choice(LAST_NAMES)}{rng.choice(['', '', str(rng.randint(1, 99999))])}"
+        username = f"{first_name.lower()}{user_id}"
+        email = f"{username}@example.com"
+        yield user_id, first_name, last_name, email, username
+
+def make_queries(count, rng):
+    queries = []
+    for _ in range(count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        kind = rng.random()
+        if kind < 0.5:
+            queries.append(first_name[:rng.randint(1, 6)])
+        elif kind < 0.8:
+            queries.append(f"{first_name} {last_name[:rng.randint(1, 4)]}")
+        else:
+            queries.append(last_name[:rng.randint(2, 6)].lower())
+    return queries
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--p99-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = UserSearchIndex()
+
+    print(f"🔧 Construindo índice com {args.users} usuários sintéticos...")
+    started = time.perf_counter()
+    index.build(synthetic_users(args.users, rng))
+    print(f"✅ Índice pronto em {time.perf_counter() - started:.1f}s "
+          f"({index.token_count()} tokens, maxrss={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024}MB)")
+
+    queries = make_queries(args.queries, rng)
+    latencies = []
+    empty = 0
+    for query in queries:
+        started = time.perf_counter()
+        results = index.search(query, limit=args.limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if not results:
+            empty += 1
+    latencies.sort()
+
+    p99 = percentile(latencies, 0.99)
+    print(f"⏱️ {len(queries)} buscas: p50={percentile(latencies, 0.50):.2f}ms "
+          f"p95={percentile(latencies, 0.95):.2f}ms p99={p99:.2f}ms max={latencies[-1]:.2f}ms "
+          f"(sem resultado: {empty})")
+
+    if p99 > args.p99_ms:
+        print(f"❌ p99 acima da meta de {args.p99_ms}ms")
+        exit(1)
+    print(f"✅ p99 dentro da meta de {args.p99_ms}ms")
+
+if __name__ == "__main__":
+    main()
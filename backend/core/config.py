@@ -12,6 +12,88 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Configurações da timeline (fan-out na escrita)
+# Autores com mais seguidores que o limite não recebem fan-out para seguidores;
+# seus posts são puxados na leitura (modelo híbrido)
+TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD = int(os.getenv("TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD", "5000"))
+TIMELINE_FANOUT_BATCH_SIZE = int(os.getenv("TIMELINE_FANOUT_BATCH_SIZE", "1000"))
+TIMELINE_CELEBRITY_CACHE_SECONDS = int(os.getenv("TIMELINE_CELEBRITY_CACHE_SECONDS", "300"))
+
+# Contadores de posts (write-behind)
+POST_COUNTER_FLUSH_SECONDS = float(os.getenv("POST_COUNTER_FLUSH_SECONDS", "2"))
+POST_COUNTER_RECONCILE_SECONDS = float(os.getenv("POST_COUNTER_RECONCILE_SECONDS", "300"))
+POST_COUNTER_RECONCILE_BATCH_SIZE = int(os.getenv("POST_COUNTER_RECONCILE_BATCH_SIZE", "500"))
+POST_COUNTER_RECONCILE_BATCHES_PER_RUN = int(os.getenv("POST_COUNTER_RECONCILE_BATCHES_PER_RUN", "20"))
+
+# Remoção de posts em segundo plano
+POST_DELETE_BATCH_SIZE = int(os.getenv("POST_DELETE_BATCH_SIZE", "1000"))
+POST_DELETE_MAX_ATTEMPTS = int(os.getenv("POST_DELETE_MAX_ATTEMPTS", "5"))
+POST_DELETE_RETRY_SECONDS = float(os.getenv("POST_DELETE_RETRY_SECONDS", "60"))
+POST_DELETE_STALE_MINUTES = int(os.getenv("POST_DELETE_STALE_MINUTES", "15"))
+
+# Índice de busca de usuários (em memória, atualizado por delta)
+USER_SEARCH_REFRESH_SECONDS = float(os.getenv("USER_SEARCH_REFRESH_SECONDS", "30"))
+# Candidatos ranqueados por proximidade social (paginados a partir do cache por consulta)
+USER_SEARCH_MAX_RESULTS = int(os.getenv("USER_SEARCH_MAX_RESULTS", "200"))
+USER_SEARCH_CACHE_SECONDS = int(os.getenv("USER_SEARCH_CACHE_SECONDS", "60"))
+
+# Contadores do perfil (user_stats)
+USER_STATS_RECONCILE_SECONDS = float(os.getenv("USER_STATS_RECONCILE_SECONDS", "600"))
+USER_STATS_RECONCILE_BATCH_SIZE = int(os.getenv("USER_STATS_RECONCILE_BATCH_SIZE", "500"))
+USER_STATS_RECONCILE_BATCHES_PER_RUN = int(os.getenv("USER_STATS_RECONCILE_BATCHES_PER_RUN", "20"))
+
+# Grafo de amizades em memória
+FRIEND_GRAPH_REFRESH_SECONDS = float(os.getenv("FRIEND_GRAPH_REFRESH_SECONDS", "30"))
+FRIEND_GRAPH_REBUILD_SECONDS = float(os.getenv("FRIEND_GRAPH_REBUILD_SECONDS", "3600"))
+FRIEND_GRAPH_MAX_DELTA = int(os.getenv("FRIEND_GRAPH_MAX_DELTA", "50000"))
+
+# Sugestões de amizade (tarefa em lote); 0 desativa a execução dentro da API
+FRIEND_SUGGESTIONS_SECONDS = float(os.getenv("FRIEND_SUGGESTIONS_SECONDS", "21600"))
+FRIEND_SUGGESTIONS_TOP_K = int(os.getenv("FRIEND_SUGGESTIONS_TOP_K", "50"))
+FRIEND_SUGGESTIONS_SHARD_SIZE = int(os.getenv("FRIEND_SUGGESTIONS_SHARD_SIZE", "20000"))
+FRIEND_SUGGESTIONS_WORKERS = int(os.getenv("FRIEND_SUGGESTIONS_WORKERS", "2"))
+
+# Privacidade no feed: posts invisíveis ao visitante são filtrados depois da busca,
+# então uma página pode precisar de mais de uma leitura para ser preenchida
+FEED_PRIVACY_MAX_SCANS = int(os.getenv("FEED_PRIVACY_MAX_SCANS", "3"))
+
+# Cache de bloqueios por usuário; invalidado neste processo ao bloquear/desbloquear,
+# o TTL limita o atraso nos demais workers
+BLOCK_CACHE_SECONDS = int(os.getenv("BLOCK_CACHE_SECONDS", "300"))
+BLOCK_CACHE_MAX_USERS = int(os.getenv("BLOCK_CACHE_MAX_USERS", "100000"))
+
+# Filtros de Bloom de e-mails/usernames usados (checagens de disponibilidade)
+# A cada verificação entram os cadastros novos (inclusive de outros workers);
+# a reconstrução completa só acontece quando os filtros passam da capacidade
+AVAILABILITY_FILTER_FALSE_POSITIVE_RATE = float(os.getenv("AVAILABILITY_FILTER_FALSE_POSITIVE_RATE", "0.01"))
+AVAILABILITY_FILTER_CHECK_SECONDS = int(os.getenv("AVAILABILITY_FILTER_CHECK_SECONDS", "30"))
+
+# Presença: online com websocket aberto ou heartbeat recente; last_seen gravado em lote
+PRESENCE_ONLINE_SECONDS = int(os.getenv("PRESENCE_ONLINE_SECONDS", "90"))
+PRESENCE_FLUSH_SECONDS = float(os.getenv("PRESENCE_FLUSH_SECONDS", "30"))
+
+# Cache do usuário autenticado (get_current_user); o TTL limita o atraso nos demais workers
+PRINCIPAL_CACHE_SECONDS = int(os.getenv("PRINCIPAL_CACHE_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_USERS = int(os.getenv("PRINCIPAL_CACHE_MAX_USERS", "50000"))
+
+# Hash de senhas (bcrypt) num pool de processos; pedidos além de MAX_PENDING recebem 503
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Refresh tokens (renovação da sessão sem bcrypt), rotacionados a cada uso
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REFRESH_TOKEN_SWEEP_SECONDS = int(os.getenv("REFRESH_TOKEN_SWEEP_SECONDS", "3600"))
+REFRESH_TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_SWEEP_BATCH_SIZE", "1000"))
+
+# Rate limiting (janela deslizante) das rotas de autenticação e verificação.
+# Em memória por processo; com vários workers, RATE_LIMIT_REDIS_URL compartilha os contadores
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "200000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+# Só atrás de proxy confiável: usa o primeiro IP de X-Forwarded-For
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
 # Configurações do banco de dados
 def get_database_url():
     """Create database URL from environment variables"""
@@ -0,0 +1,137 @@
+"""
+Hash de senhas (bcrypt) fora do event loop, num pool de processos limitado
+
+Cada hash/verificação custa centenas de milissegundos de CPU. As rotas aguardam
+o resultado sem bloquear o event loop (rotas síncronas esperam na própria thread
+do threadpool); quando a fila passa do limite, a requisição falha na hora com 503
+em vez de acumular espera.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from .config import PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+
+# min = max = padrão: qualquer hash com outro custo é refeito no próximo login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=PASSWORD_BCRYPT_ROUNDS
+)
+
+def _hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+def _verify(password: str, hashed: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    return pwd_context.verify_and_update(password, hashed), time.perf_counter() - started
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt, with queueing metrics"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: o servidor tem threads ativas, e fork com threads não é seguro
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _admit(self):
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _record(self, submitted: float, run_seconds: float):
+        # Espera na fila = tempo total menos o tempo de CPU no processo filho
+        wait_seconds = max(time.perf_counter() - submitted - run_seconds, 0.0)
+        with self._lock:
+            self._completed += 1
+            self._run_seconds += run_seconds
+            self._wait_seconds += wait_seconds
+            self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+    async def _run(self, func, *args):
+        self._admit()
+        submitted = time.perf_counter()
+        try:
+            result, run_seconds = await asyncio.wrap_future(self._executor.submit(func, *args))
+        finally:
+            self._release()
+        self._record(submitted, run_seconds)
+        return result
+
+    def _run_sync(self, func, *args):
+        # Rotas síncronas: a thread do threadpool espera, o event loop fica livre
+        self._admit()
+        submitted = time.perf_counter()
+        try:
+            result, run_seconds = self._executor.submit(func, *args).result()
+        finally:
+            self._release()
+        self._record(submitted, run_seconds)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash uses outdated cost parameters"""
+        return await self._run(_verify, password, hashed)
+
+    def hash_sync(self, password: str) -> str:
+        """Blocking `hash`, for routes declared with plain `def`"""
+        return self._run_sync(_hash, password)
+
+    def verify_sync(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Blocking `verify`, for routes declared with plain `def`"""
+        return self._run_sync(_verify, password, hashed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 1),
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 1),
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 1)
+            }
+
+# Instância global do pool de hash de senhas
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
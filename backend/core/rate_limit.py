@@ -0,0 +1,221 @@
+"""
+Rate limiting com janela deslizante (rotas de autenticação e verificação)
+
+Cada regra conta pedidos por chave (IP, e-mail, usuário) na janela atual e na
+anterior; a anterior pesa proporcionalmente ao quanto dela ainda cabe na janela
+deslizante. Regras de um pedido por janela (cooldown) são exatas: guardam o
+instante do último pedido. Rajadas são recusadas com 429 antes de tocar no banco
+ou no bcrypt. Os contadores ficam em memória por processo, então com N workers
+cada um aceita a cota inteira; um backend compartilhado (Redis) mantém o limite
+global, e limites que precisam valer de verdade conferem também o banco.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request
+from jose import JWTError, jwt
+
+from .config import (
+    SECRET_KEY,
+    ALGORITHM,
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_TRUST_PROXY
+)
+
+def _retry_after(previous: int, count: int, limit: int, window: float, elapsed: float) -> int:
+    """Seconds until one more request fits, given the counts before the rejected one"""
+    if count + 1 > limit:
+        # A janela atual sozinha já estourou: olhar a partir da próxima
+        previous, count, elapsed = count, 0, elapsed - window
+    fraction = 1 - (limit - count - 1) / previous if previous else 0
+    return max(1, math.ceil(fraction * window - elapsed))
+
+class RateLimitBackend(ABC):
+    """Counter storage; `hit` records a request unless it would exceed the limit"""
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, int]:
+        """(allowed, retry_after_seconds)"""
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process counters, bounded to `max_keys` (least recently used are dropped)"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # chave -> (índice da janela, contagem da anterior, contagem da atual);
+        # cooldowns guardam (-1, instante do último pedido, 0)
+        self._entries: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+
+    def _cooldown(self, key: str, window: float, now: float) -> Tuple[bool, int]:
+        # Limite 1: a média ponderada da janela anterior bloquearia por até 2x a janela
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == -1 and now - entry[1] < window:
+                return False, max(1, math.ceil(entry[1] + window - now))
+            self._entries[key] = (-1, now, 0)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        return True, 0
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, int]:
+        if limit == 1:
+            return self._cooldown(key, window, now)
+        index = int(now // window)
+        elapsed = now - index * window
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < index - 1:
+                previous, count = 0, 0
+            elif entry[0] == index - 1:
+                previous, count = entry[2], 0
+            else:
+                previous, count = entry[1], entry[2]
+
+            allowed = previous * (1 - elapsed / window) + count + 1 <= limit
+            if allowed:
+                count += 1
+            self._entries[key] = (index, previous, count)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+        return (True, 0) if allowed else (False, _retry_after(previous, count, limit, window, elapsed))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisBackend(RateLimitBackend):
+    """Counters shared by all workers: one key per (rule key, window), expiring after two windows"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def hit(self, key: str, limit: int, window: float, now: float) -> Tuple[bool, int]:
+        if limit == 1:
+            # Cooldown exato: a chave existe enquanto o último pedido vale
+            cooldown_key = f"rl:{key}:cooldown"
+            if self.client.set(cooldown_key, 1, nx=True, px=int(window * 1000)):
+                return True, 0
+            return False, max(1, math.ceil(self.client.pttl(cooldown_key) / 1000))
+
+        index = int(now // window)
+        elapsed = now - index * window
+        current_key = f"rl:{key}:{index}"
+        pipeline = self.client.pipeline()
+        pipeline.incr(current_key)
+        pipeline.expire(current_key, int(window * 2) + 1)
+        pipeline.get(f"rl:{key}:{index - 1}")
+        count, _, previous = pipeline.execute()
+        previous = int(previous or 0)
+
+        if previous * (1 - elapsed / window) + count <= limit:
+            return True, 0
+        # Pedido recusado não conta
+        self.client.decr(current_key)
+        return False, _retry_after(previous, count - 1, limit, window, elapsed)
+
+def _default_backend() -> RateLimitBackend:
+    if RATE_LIMIT_REDIS_URL:
+        # Dependência opcional, só necessária com vários workers
+        import redis
+        return RedisBackend(redis.Redis.from_url(RATE_LIMIT_REDIS_URL))
+    return MemoryBackend(RATE_LIMIT_MAX_KEYS)
+
+class RateLimiter:
+    """Applies rules against a backend; backend failures let the request through"""
+
+    def __init__(self, backend: RateLimitBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._rejected: Dict[str, int] = {}
+
+    def hit(self, rule: str, value: str, limit: int, window: float) -> Tuple[bool, int]:
+        if not self.enabled:
+            return True, 0
+        try:
+            allowed, retry_after = self.backend.hit(f"{rule}:{value}", limit, window, time.time())
+        except Exception as e:
+            print(f"❌ Erro no rate limiter ({rule}): {e}")
+            return True, 0
+        if not allowed:
+            with self._lock:
+                self._rejected[rule] = self._rejected.get(rule, 0) + 1
+        return allowed, retry_after
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": type(self.backend).__name__, "enabled": self.enabled, "rejected": dict(self._rejected)}
+
+# Instância global do rate limiter
+rate_limiter = RateLimiter(_default_backend(), RATE_LIMIT_ENABLED)
+
+KeyFunc = Callable[[Request], Union[Optional[str], Awaitable[Optional[str]]]]
+
+def client_ip(request: Request) -> Optional[str]:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+def body_field(name: str) -> KeyFunc:
+    """Key on a field of the JSON body (FastAPI has already parsed and cached it)"""
+    async def key(request: Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except Exception:
+            return None
+        value = body.get(name) if isinstance(body, dict) else None
+        return str(value).lower().strip() if value not in (None, "") else None
+    return key
+
+def token_user(request: Request) -> Optional[str]:
+    """Key on the user_id claim of the bearer token, without touching the database"""
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("user_id")
+    return str(user_id) if user_id is not None else None
+
+class RateLimit:
+    """Dependency: at most `limit` requests per `window_seconds` for each key value.
+
+        @router.post("/login", dependencies=[Depends(RateLimit("login-ip", 20, 60))])
+    """
+
+    def __init__(self, rule: str, limit: int, window_seconds: float, key: KeyFunc = client_ip,
+                 detail: str = "Too many requests, try again in {seconds} seconds"):
+        self.rule = rule
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.key = key
+        self.detail = detail
+
+    async def __call__(self, request: Request):
+        value = self.key(request)
+        if hasattr(value, "__await__"):
+            value = await value
+        if value is None:
+            return
+
+        allowed, retry_after = rate_limiter.hit(self.rule, value, self.limit, self.window_seconds)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=self.detail.format(seconds=retry_after),
+                headers={"Retry-After": str(retry_after)}
+            )
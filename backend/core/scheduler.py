@@ -0,0 +1,38 @@
+"""
+Agendador de tarefas periódicas em segundo plano
+"""
+import asyncio
+from typing import Callable, List, Tuple
+
+class Scheduler:
+    def __init__(self):
+        self.jobs: List[Tuple[str, float, Callable[[], None], bool]] = []
+        self.tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable[[], None], run_immediately: bool = False):
+        """Register a blocking function to run every `interval_seconds` in a worker thread"""
+        self.jobs.append((name, interval_seconds, func, run_immediately))
+
+    async def _run(self, name: str, interval_seconds: float, func: Callable[[], None], run_immediately: bool):
+        if not run_immediately:
+            await asyncio.sleep(interval_seconds)
+        while True:
+            try:
+                await asyncio.to_thread(func)
+            except Exception as e:
+                print(f"⚠️ Erro na tarefa periódica {name}: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def start(self):
+        for name, interval_seconds, func, run_immediately in self.jobs:
+            self.tasks.append(asyncio.create_task(self._run(name, interval_seconds, func, run_immediately)))
+        print(f"⏱️ {len(self.tasks)} tarefas periódicas iniciadas")
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+
+# Instância global do agendador
+scheduler = Scheduler()
@@ -7,19 +7,17 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 
-from .config import SECRET_KEY, ALGORITHM
+from .cache import TTLCache
+from .config import SECRET_KEY, ALGORITHM, PRINCIPAL_CACHE_SECONDS, PRINCIPAL_CACHE_MAX_USERS
 from .database import get_db
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .hashing import pwd_context
 
 # OAuth2
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def hash_password(password: str) -> str:
-    """Hash a password"""
+    """Hash a password inline (scripts); routes use `password_hasher` instead"""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -37,44 +35,85 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
+class Principal:
+    """Lightweight authenticated user: the columns authorization and most routes need.
+
+    Routes that modify the user (or return the full row) load the ORM
+    object by `id` themselves.
+    """
+
+    COLUMNS = ("id", "email", "first_name", "last_name", "username", "avatar", "is_active", "is_verified")
+
+    def __init__(self, id: int, email: str, first_name: str, last_name: str, username: Optional[str],
+                 avatar: Optional[str], is_active: bool, is_verified: bool):
+        self.id = id
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+        self.username = username
+        self.avatar = avatar
+        self.is_active = is_active
+        self.is_verified = is_verified
+
+    def as_dict(self) -> dict:
+        return {column: getattr(self, column) for column in self.COLUMNS}
+
+_principal_cache = TTLCache(PRINCIPAL_CACHE_SECONDS, max_size=PRINCIPAL_CACHE_MAX_USERS)
+
+def invalidate_principal(user_id: int):
+    """Call after a profile update, deactivation or password change"""
+    _principal_cache.pop(user_id)
+
+def _load_principal(db: Session, user_id: Optional[int], email: str) -> Optional[Principal]:
     from models.user import User  # Import here to avoid circular imports
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+
+    query = db.query(*(getattr(User, column) for column in Principal.COLUMNS))
+    # Tokens antigos sem a claim user_id: busca pelo e-mail
+    row = query.filter(User.id == user_id).first() if user_id is not None else query.filter(User.email == email).first()
+    return Principal(*row) if row else None
+
+def principal_from_token(token: str, db: Optional[Session] = None) -> Optional[Principal]:
+    """Decode the JWT and resolve its user, from the cache when possible (None when invalid)"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        return None
+    email: str = payload.get("sub")
+    user_id = payload.get("user_id")
+    if email is None:
+        return None
 
-def verify_websocket_token(token: str):
-    """Verify a WebSocket token"""
-    from models.user import User  # Import here to avoid circular imports
-    from .database import SessionLocal
-    
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    principal = _principal_cache.get(user_id) if user_id is not None else None
+    if principal is None:
+        if db is None:
+            from .database import SessionLocal
+            session = SessionLocal()
+            try:
+                principal = _load_principal(session, user_id, email)
+            finally:
+                session.close()
+        else:
+            principal = _load_principal(db, user_id, email)
+        if principal is None:
             return None
-        
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.email == email).first()
-            return user
-        finally:
-            db.close()
-    except JWTError:
+        _principal_cache.set(principal.id, principal)
+
+    # E-mail trocado ou conta desativada invalidam tokens antigos
+    if principal.email != email or not principal.is_active:
         return None
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """Get the current authenticated user (no query while the principal is cached)"""
+    principal = principal_from_token(token, db)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+def verify_websocket_token(token: str):
+    """Verify a WebSocket token"""
+    return principal_from_token(token)
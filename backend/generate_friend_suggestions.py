@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Gera as sugestões de amizade fora do servidor (cron)
+
+Útil com FRIEND_SUGGESTIONS_SECONDS=0, para não ocupar CPU da API com a tarefa.
+
+Uso: python generate_friend_suggestions.py --workers 4 --shard-size 20000 --top-k 50
+"""
+import argparse
+
+from utils.friend_suggestions import generate_friend_suggestions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=None)
+    parser.add_argument("--top-k", type=int, default=None)
+    args = parser.parse_args()
+
+    generate_friend_suggestions(workers=args.workers, shard_size=args.shard_size, top_k=args.top_k)
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,45 @@ Script para inicializar o banco de dados MySQL com as tabelas necessárias
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from core.database import Base
-from core.config import get_database_url
+from core.config import get_database_url, TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD
 import os
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+def index_exists(conn, db_name, table, index_name):
+    """Verifica se um índice já existe (migrações de dados rodam só antes de criá-lo)"""
+    result = conn.execute(text("""
+        SELECT INDEX_NAME
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = :schema
+        AND TABLE_NAME = :table
+        AND INDEX_NAME = :index_name
+    """), {"schema": db_name, "table": table, "index_name": index_name})
+    return result.fetchone() is not None
+
+def ensure_index(conn, db_name, table, index_name, columns, unique=False):
+    """Cria um índice em uma tabela existente caso ele ainda não exista"""
+    if not index_exists(conn, db_name, table, index_name):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(text(f"CREATE {kind} {index_name} ON {table} ({columns})"))
+        print(f"✅ Índice {index_name} criado em {table}!")
+
+def ensure_column(conn, db_name, table, column, definition):
+    """Adiciona uma coluna a uma tabela existente caso ela ainda não exista"""
+    result = conn.execute(text("""
+        SELECT COLUMN_NAME
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = :schema
+        AND TABLE_NAME = :table
+        AND COLUMN_NAME = :column
+    """), {"schema": db_name, "table": table, "column": column})
+
+    if not result.fetchone():
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+        print(f"✅ Coluna {column} adicionada à tabela {table}!")
+
 def init_database():
     """Inicializa o banco de dados com as tabelas necessárias"""
     try:
@@ -82,6 +114,60 @@ def init_database():
 
             conn.commit()
             print("✅ Tabelas de verificação de e-mail configuradas!")
+
+        # Colunas e índices adicionados depois da criação original das tabelas
+        with engine.connect() as conn:
+            ensure_column(conn, db_name, "posts", "deleted_at", "DATETIME NULL")
+            ensure_index(conn, db_name, "posts", "ix_posts_created_at_id", "created_at, id")
+            ensure_index(conn, db_name, "shares", "ix_shares_post_user", "post_id, user_id")
+
+            # Remove reações duplicadas (mantém a mais recente) antes do índice único;
+            # depois dele não há como surgirem novas, então só roda uma vez
+            if not index_exists(conn, db_name, "reactions", "uq_reactions_post_user"):
+                conn.execute(text("""
+                    DELETE older FROM reactions older
+                    JOIN reactions newer
+                      ON older.post_id = newer.post_id
+                     AND older.user_id = newer.user_id
+                     AND older.id < newer.id
+                """))
+                ensure_index(conn, db_name, "reactions", "uq_reactions_post_user", "post_id, user_id", unique=True)
+            ensure_index(conn, db_name, "comments", "ix_comments_post_parent_created", "post_id, parent_id, created_at, id")
+            ensure_index(conn, db_name, "comments", "ix_comments_parent_created", "parent_id, created_at, id")
+            ensure_index(conn, db_name, "friendships", "ix_friendships_requester_status", "requester_id, status")
+            ensure_index(conn, db_name, "friendships", "ix_friendships_addressee_status", "addressee_id, status")
+            ensure_index(conn, db_name, "friendships", "ix_friendships_pair", "requester_id, addressee_id, status")
+            ensure_index(conn, db_name, "follows", "ix_follows_followed_created", "followed_id, created_at")
+            ensure_index(conn, db_name, "follows", "ix_follows_follower_created", "follower_id, created_at")
+            # Remove follows duplicados (mantém o mais antigo) antes do índice único;
+            # depois dele não há como surgirem novos, então só roda uma vez
+            if not index_exists(conn, db_name, "follows", "uq_follows_pair"):
+                conn.execute(text("""
+                    DELETE newer FROM follows newer
+                    JOIN follows older
+                      ON older.follower_id = newer.follower_id
+                     AND older.followed_id = newer.followed_id
+                     AND older.id < newer.id
+                """))
+                ensure_index(conn, db_name, "follows", "uq_follows_pair", "follower_id, followed_id", unique=True)
+
+            # user_stats é criada sob demanda: garante a linha de quem já passou do limite
+            # de celebridade antes de a timeline passar a ler followers_count
+            if not index_exists(conn, db_name, "user_stats", "ix_user_stats_followers_count"):
+                from utils.profile_stats import get_user_stats
+                celebrities = conn.execute(text("""
+                    SELECT followed_id FROM follows
+                    GROUP BY followed_id
+                    HAVING COUNT(*) > :threshold
+                """), {"threshold": TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD}).fetchall()
+                db = sessionmaker(bind=engine)()
+                try:
+                    for row in celebrities:
+                        get_user_stats(db, row[0])
+                finally:
+                    db.close()
+                ensure_index(conn, db_name, "user_stats", "ix_user_stats_followers_count", "followers_count")
+            conn.commit()
         
         # Verificar tabelas criadas
         with engine.connect() as conn:
@@ -7,9 +7,33 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from core.config import ALLOWED_ORIGINS
+from core.config import (
+    ALLOWED_ORIGINS,
+    POST_COUNTER_FLUSH_SECONDS,
+    POST_COUNTER_RECONCILE_SECONDS,
+    POST_DELETE_RETRY_SECONDS,
+    USER_SEARCH_REFRESH_SECONDS,
+    USER_STATS_RECONCILE_SECONDS,
+    FRIEND_GRAPH_REFRESH_SECONDS,
+    FRIEND_SUGGESTIONS_SECONDS,
+    AVAILABILITY_FILTER_CHECK_SECONDS,
+    PRESENCE_FLUSH_SECONDS,
+    REFRESH_TOKEN_SWEEP_SECONDS
+)
 from core.database import engine, Base
-from routes import auth_router, posts_router, users_router, email_verification_router
+from core.scheduler import scheduler
+from routes import auth_router, posts_router, users_router, email_verification_router, websocket_router
+from utils.counters import flush_post_counters, reconcile_post_counters
+from utils.post_cleanup import resume_post_deletions
+from utils.profile_stats import reconcile_user_stats
+from utils.friend_graph import refresh_friend_graph
+from utils.friend_suggestions import generate_friend_suggestions
+from utils.availability import refresh_taken_names
+from utils.presence import flush_presence
+from core.hashing import password_hasher
+from core.rate_limit import rate_limiter
+from utils.refresh_tokens import sweep_refresh_tokens
+from utils.user_search import refresh_user_search_index
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -32,12 +56,31 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Erro ao criar tabelas: {e}")
 
+    # Tarefas periódicas em segundo plano
+    scheduler.add_job("flush_post_counters", POST_COUNTER_FLUSH_SECONDS, flush_post_counters)
+    scheduler.add_job("reconcile_post_counters", POST_COUNTER_RECONCILE_SECONDS, reconcile_post_counters)
+    scheduler.add_job("resume_post_deletions", POST_DELETE_RETRY_SECONDS, resume_post_deletions)
+    scheduler.add_job("refresh_user_search_index", USER_SEARCH_REFRESH_SECONDS, refresh_user_search_index, run_immediately=True)
+    scheduler.add_job("refresh_friend_graph", FRIEND_GRAPH_REFRESH_SECONDS, refresh_friend_graph, run_immediately=True)
+    scheduler.add_job("reconcile_user_stats", USER_STATS_RECONCILE_SECONDS, reconcile_user_stats)
+    scheduler.add_job("flush_presence", PRESENCE_FLUSH_SECONDS, flush_presence)
+    scheduler.add_job("sweep_refresh_tokens", REFRESH_TOKEN_SWEEP_SECONDS, sweep_refresh_tokens)
+    scheduler.add_job("refresh_taken_names", AVAILABILITY_FILTER_CHECK_SECONDS, refresh_taken_names, run_immediately=True)
+    if FRIEND_SUGGESTIONS_SECONDS > 0:
+        scheduler.add_job("generate_friend_suggestions", FRIEND_SUGGESTIONS_SECONDS, generate_friend_suggestions)
+    scheduler.start()
+    password_hasher.start()
+
     print("🌟 API pronta para uso!")
 
     yield
 
     # Shutdown
     print("🛑 Encerrando API...")
+    await scheduler.stop()
+    flush_post_counters()
+    flush_presence()
+    password_hasher.shutdown()
 
 # Criar instância da aplicação FastAPI
 app = FastAPI(
@@ -70,6 +113,7 @@ app.include_router(auth_router)
 app.include_router(posts_router)
 app.include_router(users_router)
 app.include_router(email_verification_router)
+app.include_router(websocket_router)
 
 @app.get("/")
 async def root():
@@ -83,7 +127,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "password_hashing": password_hasher.stats(), "rate_limit": rate_limiter.stats()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,16 +1,20 @@
 """
 Modelos do banco de dados
 """
-from .user import User
-from .post import Post, Reaction, Comment, Share
+from .user import User, UserStats
+from .post import Post, PostDeletionJob, Reaction, PostReactionCount, Comment, Share
 from .story import Story, StoryView, StoryTag, StoryOverlay
-from .friendship import Friendship, Block, Follow
+from .friendship import Friendship, Block, Follow, FriendSuggestion
 from .notification import Notification, Message, MediaFile
+from .timeline import TimelineEntry
+from .session import RefreshToken
 
 __all__ = [
-    "User",
-    "Post", "Reaction", "Comment", "Share",
+    "User", "UserStats",
+    "Post", "PostDeletionJob", "Reaction", "PostReactionCount", "Comment", "Share",
     "Story", "StoryView", "StoryTag", "StoryOverlay", 
-    "Friendship", "Block", "Follow",
-    "Notification", "Message", "MediaFile"
+    "Friendship", "Block", "Follow", "FriendSuggestion",
+    "Notification", "Message", "MediaFile",
+    "TimelineEntry",
+    "RefreshToken"
 ]
@@ -1,7 +1,7 @@
 """
 Modelos de relacionamentos entre usuários
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -19,6 +19,13 @@ class Friendship(Base):
     requester = relationship("User", foreign_keys=[requester_id])
     addressee = relationship("User", foreign_keys=[addressee_id])
 
+    __table_args__ = (
+        Index("ix_friendships_requester_status", "requester_id", "status"),
+        Index("ix_friendships_addressee_status", "addressee_id", "status"),
+        # Checagem de amizade entre dois usuários: pontos exatos nas duas direções
+        Index("ix_friendships_pair", "requester_id", "addressee_id", "status"),
+    )
+
 class Block(Base):
     __tablename__ = "blocks"
 
@@ -40,3 +47,24 @@ class Follow(Base):
 
     follower = relationship("User", foreign_keys=[follower_id], backref="following")
     followed = relationship("User", foreign_keys=[followed_id], backref="followers")
+
+    __table_args__ = (
+        Index("ix_follows_followed_created", "followed_id", "created_at"),
+        Index("ix_follows_follower_created", "follower_id", "created_at"),
+        # Um follow por par; também atende a checagem "sigo estes usuários?"
+        Index("uq_follows_pair", "follower_id", "followed_id", unique=True),
+    )
+
+class FriendSuggestion(Base):
+    """Sugestões de amizade ("pessoas que você talvez conheça") geradas pela tarefa em lote"""
+    __tablename__ = "friend_suggestions"
+
+    user_id = Column(Integer, primary_key=True)
+    suggested_user_id = Column(Integer, primary_key=True)
+    mutual_friends = Column(Integer, nullable=False, default=0)
+    position = Column(Integer, nullable=False, default=0)
+    generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_friend_suggestions_user_position", "user_id", "position"),
+    )
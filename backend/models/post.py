@@ -1,7 +1,7 @@
 """
 Modelos relacionados a posts
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -23,9 +23,28 @@ class Post(Base):
     shares_count = Column(Integer, default=0)
     is_profile_update = Column(Boolean, default=False)
     is_cover_update = Column(Boolean, default=False)
+    deleted_at = Column(DateTime, nullable=True)  # ocultado; dependentes removidos em segundo plano
     
     author = relationship("User", backref="posts")
 
+    __table_args__ = (
+        # Paginação keyset do feed: ORDER BY created_at DESC, id DESC
+        Index("ix_posts_created_at_id", "created_at", "id"),
+    )
+
+class PostDeletionJob(Base):
+    """Remoção em segundo plano, em lotes, dos dependentes de um post ocultado"""
+    __tablename__ = "post_deletion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, nullable=False, unique=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    rows_deleted = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class Reaction(Base):
     __tablename__ = "reactions"
     
@@ -39,6 +58,20 @@ class Reaction(Base):
     user = relationship("User", backref="reactions")
     post = relationship("Post", backref="reactions")
 
+    __table_args__ = (
+        # Uma reação por usuário e post; base do upsert atômico
+        UniqueConstraint("post_id", "user_id", name="uq_reactions_post_user"),
+    )
+
+class PostReactionCount(Base):
+    """Histograma materializado de reações por tipo de cada post"""
+    __tablename__ = "post_reaction_counts"
+
+    # Sem FK: o flush em lote não pode falhar inteiro por causa de um post já removido
+    post_id = Column(Integer, primary_key=True)
+    reaction_type = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 class Comment(Base):
     __tablename__ = "comments"
     
@@ -53,6 +86,13 @@ class Comment(Base):
     post = relationship("Post", backref="comments")
     parent = relationship("Comment", remote_side=[id], backref="replies")
 
+    __table_args__ = (
+        # Comentários de primeiro nível de um post (parent_id IS NULL) em ordem cronológica
+        Index("ix_comments_post_parent_created", "post_id", "parent_id", "created_at", "id"),
+        # Respostas de um conjunto de comentários, limitadas por pai
+        Index("ix_comments_parent_created", "parent_id", "created_at", "id"),
+    )
+
 class Share(Base):
     __tablename__ = "shares"
     
@@ -62,3 +102,7 @@ class Share(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", backref="shares")
+
+    __table_args__ = (
+        Index("ix_shares_post_user", "post_id", "user_id"),
+    )
@@ -0,0 +1,27 @@
+"""
+Modelo de refresh tokens (sessões por dispositivo)
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from core.database import Base
+
+class RefreshToken(Base):
+    """Um token por linha; a rotação revoga o atual e cria o próximo na mesma família (dispositivo)"""
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # HMAC-SHA256 do token opaco; o token em si nunca é gravado
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False)
+    device = Column(String(200))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_family", "user_id", "family_id"),
+        Index("ix_refresh_tokens_family", "family_id"),
+        # Varredura das sessões vencidas
+        Index("ix_refresh_tokens_expires", "expires_at"),
+    )
@@ -0,0 +1,20 @@
+"""
+Modelo da timeline materializada (fan-out na escrita)
+"""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from core.database import Base
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # dono da timeline
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False)  # cópia de posts.created_at para ordenar sem join
+
+    __table_args__ = (
+        # Leitura do feed: um range scan por usuário em (created_at DESC, post_id DESC)
+        Index("ix_timeline_user_created_post", "user_id", "created_at", "post_id"),
+        UniqueConstraint("user_id", "post_id", name="uq_timeline_user_post"),
+    )
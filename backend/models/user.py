@@ -1,7 +1,7 @@
 """
 Modelo de usuário
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Date, Index
 from datetime import datetime
 from core.database import Base
 
@@ -56,3 +56,19 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     last_seen = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
+
+class UserStats(Base):
+    """Contadores do perfil, mantidos nas escritas e reconciliados periodicamente"""
+    __tablename__ = "user_stats"
+    __table_args__ = (
+        # Celebridades da timeline: range scan em followers_count > limite
+        Index("ix_user_stats_followers_count", "followers_count"),
+    )
+
+    # Sem FK: a linha é criada sob demanda na primeira leitura do perfil
+    user_id = Column(Integer, primary_key=True)
+    friends_count = Column(Integer, default=0, nullable=False)
+    posts_count = Column(Integer, default=0, nullable=False)
+    followers_count = Column(Integer, default=0, nullable=False)
+    following_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
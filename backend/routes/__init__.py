@@ -5,10 +5,12 @@ from .auth import router as auth_router
 from .posts import router as posts_router
 from .users import router as users_router
 from .email_verification import router as email_verification_router
+from .websocket import router as websocket_router
 
 __all__ = [
     "auth_router",
     "posts_router",
     "users_router",
-    "email_verification_router"
+    "email_verification_router",
+    "websocket_router"
 ]
@@ -1,18 +1,33 @@
 """
 Rotas de autenticação
 """
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import List
 
 from core.database import get_db
-from core.security import hash_password, verify_password, create_access_token, get_current_user
+from core.security import create_access_token, get_current_user
+from core.hashing import password_hasher
+from core.rate_limit import RateLimit, body_field, token_user
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from models import User
-from schemas import LoginRequest, Token, UserCreate, UserResponse
+from schemas import LoginRequest, Token, UserCreate, UserResponse, RefreshRequest, SessionResponse
+from utils.user_search import user_search_index
+from utils.availability import taken_names
+from utils.refresh_tokens import issue_refresh_token, rotate_refresh_token, revoke_refresh_token, revoke_family, active_sessions
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Limites por IP, e-mail e usuário: rajadas recusadas antes do banco e do bcrypt
+REGISTER_LIMITS = [Depends(RateLimit("register-ip", 10, 3600))]
+LOGIN_LIMITS = [
+    Depends(RateLimit("login-ip", 30, 60)),
+    Depends(RateLimit("login-email", 10, 900, body_field("email")))
+]
+REFRESH_LIMITS = [Depends(RateLimit("refresh-ip", 60, 60))]
+AVAILABILITY_LIMITS = [Depends(RateLimit("availability-ip", 60, 60))]
+
 @router.get("/test-db")
 def test_database_connection(db: Session = Depends(get_db)):
     """Test endpoint to verify database connection and schema"""
@@ -39,7 +54,7 @@ def test_database_connection(db: Session = Depends(get_db)):
             "database_connected": False
         }
 
-@router.post("/register")
+@router.post("/register", dependencies=REGISTER_LIMITS)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     try:
         print(f"🔍 Registration attempt for email: {user.email}")
@@ -65,8 +80,8 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 
         print(f"✅ Email available: {user.email}")
 
-        # Hash password
-        hashed_password = hash_password(user.password)
+        # Hash password (pool de processos; a rota roda no threadpool)
+        hashed_password = password_hasher.hash_sync(user.password)
         print(f"✅ Password hashed successfully")
 
         # Process birth date
@@ -102,6 +117,9 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         db.refresh(db_user)
 
         print(f"✅ User {db_user.id} created successfully!")
+        user_search_index.upsert(db_user.id, db_user.first_name, db_user.last_name, db_user.email, db_user.username)
+        taken_names.add_email(db_user.email)
+        taken_names.add_username(db_user.username)
 
         # Return minimal response to avoid serialization issues
         return {
@@ -123,17 +141,23 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
-@router.post("/login", response_model=Token)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+@router.post("/login", response_model=Token, dependencies=LOGIN_LIMITS)
+def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
     try:
         user = db.query(User).filter(User.email == login_data.email).first()
-        
-        if not user or not verify_password(login_data.password, user.password_hash):
+
+        valid, new_hash = password_hasher.verify_sync(login_data.password, user.password_hash) if user else (False, None)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+
+        # Custo do bcrypt mudou: regrava o hash com a senha que acabou de ser conferida
+        if new_hash:
+            user.password_hash = new_hash
+            db.commit()
         
         if not user.is_active:
             raise HTTPException(status_code=400, detail="Inactive user")
@@ -142,36 +166,89 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         access_token = create_access_token(
             data={"sub": user.email, "user_id": user.id}, expires_delta=access_token_expires
         )
-        
-        return {"access_token": access_token, "token_type": "bearer"}
+
+        # Nova sessão de dispositivo: renovações seguintes usam /auth/refresh, sem bcrypt
+        refresh_token = issue_refresh_token(db, user.id, request.headers.get("user-agent"))
+        db.commit()
+
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
-@router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
+@router.post("/refresh", response_model=Token, dependencies=REFRESH_LIMITS)
+def refresh_session(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """Trocar o refresh token por um novo par de tokens (o antigo deixa de valer)"""
+    rotated = rotate_refresh_token(db, refresh_data.refresh_token)
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user_id, email, refresh_token = rotated
+    access_token = create_access_token(
+        data={"sub": email, "user_id": user_id}, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/logout", dependencies=REFRESH_LIMITS)
+def logout(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """Encerrar a sessão deste dispositivo"""
+    revoke_refresh_token(db, refresh_data.refresh_token)
+    db.commit()
+    return {"message": "Logged out"}
+
+@router.get("/sessions", response_model=List[SessionResponse])
+def list_sessions(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Sessões ativas (dispositivos) do usuário atual"""
+    return [SessionResponse(**row._asdict()) for row in active_sessions(db, current_user.id)]
+
+@router.delete("/sessions/{family_id}")
+def revoke_session(family_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Encerrar a sessão de um dispositivo"""
+    revoked = revoke_family(db, family_id, current_user.id)
+    db.commit()
+    if not revoked:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"message": "Session revoked"}
 
-@router.get("/check-email")
+@router.get("/me", response_model=UserResponse)
+async def get_current_user_info(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Resposta completa do perfil: aqui sim a linha inteira do usuário
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@router.get("/check-email", dependencies=AVAILABILITY_LIMITS)
 def check_email_exists(email: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == email).first()
+    # Fora do filtro de Bloom: certamente livre, sem consulta
+    if not taken_names.might_have_email(email):
+        return {"exists": False}
+    user = db.query(User.id).filter(User.email == email).first()
     return {"exists": user is not None}
 
-@router.get("/check-username")
+@router.get("/check-username", dependencies=[Depends(RateLimit("availability-user", 60, 60, token_user))])
 def check_username_exists(username: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(
+    if not taken_names.might_have_username(username):
+        return {"exists": False}
+    user = db.query(User.id).filter(
         User.username == username,
         User.id != current_user.id  # Exclude current user
     ).first()
     return {"exists": user is not None}
 
-@router.get("/check-username-public")
+@router.get("/check-username-public", dependencies=AVAILABILITY_LIMITS)
 def check_username_exists_public(username: str, db: Session = Depends(get_db)):
     """Public route to check username availability during registration"""
-    user = db.query(User).filter(User.username == username).first()
+    if not taken_names.might_have_username(username):
+        return {"exists": False}
+    user = db.query(User.id).filter(User.username == username).first()
     return {"exists": user is not None}
 
 @router.get("/verify-token")
 async def verify_token(current_user: User = Depends(get_current_user)):
-    return {"valid": True, "user": current_user}
+    return {"valid": True, "user": current_user.as_dict()}
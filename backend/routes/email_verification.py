@@ -3,17 +3,36 @@ Rotas de verificação de e-mail
 """
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, func
 from datetime import datetime, timedelta
 import random
 import secrets
 from pydantic import BaseModel
 
 from core.database import get_db, Base
+from core.security import invalidate_principal
+from core.rate_limit import RateLimit, body_field
 from models import User
 
 router = APIRouter(prefix="/email-verification", tags=["email-verification"])
 
+# Anti-spam em memória: 1 envio por minuto e 5 por hora por usuário (e por e-mail).
+# Rajadas param aqui, sem consultar email_verifications; os contadores são por
+# processo, então o mesmo limite é conferido no banco para quem passa (ver abaixo)
+COOLDOWN_DETAIL = "Aguarde {seconds} segundos antes de solicitar um novo código"
+HOURLY_DETAIL = "Muitas tentativas. Tente novamente em {seconds} segundos."
+SEND_LIMITS = [
+    Depends(RateLimit("verification-send-user-cooldown", 1, 60, body_field("user_id"), COOLDOWN_DETAIL)),
+    Depends(RateLimit("verification-send-user", 5, 3600, body_field("user_id"), HOURLY_DETAIL)),
+    Depends(RateLimit("verification-send-email", 5, 3600, body_field("email"), HOURLY_DETAIL)),
+    Depends(RateLimit("verification-send-ip", 20, 3600, detail=HOURLY_DETAIL))
+]
+# Código de 6 dígitos: limitar tentativas contra força bruta
+VERIFY_LIMITS = [
+    Depends(RateLimit("verification-code-user", 10, 900, body_field("user_id"), HOURLY_DETAIL)),
+    Depends(RateLimit("verification-code-ip", 30, 900, detail=HOURLY_DETAIL))
+]
+
 # Modelo para verificações de e-mail
 class EmailVerification(Base):
     __tablename__ = "email_verifications"
@@ -105,7 +124,7 @@ def create_verification_record(user_id: int, email: str, first_name: str, db: Se
         db.rollback()
         return False
 
-@router.post("/send-verification")
+@router.post("/send-verification", dependencies=SEND_LIMITS)
 async def send_verification_email(
     request: SendVerificationRequest,
     db: Session = Depends(get_db)
@@ -124,12 +143,16 @@ async def send_verification_email(
             print(f"❌ User {user_id} not found in database")
             raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-        # Verificar limite de tentativas (anti-spam) - 5 por hora
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        recent_attempts = db.query(EmailVerification).filter(
+        # Piso entre workers: SEND_LIMITS é por processo, o banco vale para todos.
+        # Uma consulta só (contagem na última hora + último envio)
+        now = datetime.utcnow()
+        recent_attempts, last_sent_at = db.query(
+            func.count(EmailVerification.id),
+            func.max(EmailVerification.created_at)
+        ).filter(
             EmailVerification.user_id == user_id,
-            EmailVerification.created_at > one_hour_ago
-        ).count()
+            EmailVerification.created_at > now - timedelta(hours=1)
+        ).one()
 
         if recent_attempts >= 5:
             print(f"❌ Too many attempts for user {user_id}")
@@ -138,20 +161,13 @@ async def send_verification_email(
                 detail="Muitas tentativas. Tente novamente em 1 hora."
             )
 
-        # Verificar cooldown (1 minuto)
-        one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-        recent_attempt = db.query(EmailVerification).filter(
-            EmailVerification.user_id == user_id,
-            EmailVerification.created_at > one_minute_ago
-        ).first()
-
-        if recent_attempt:
-            remaining_time = 60 - int((datetime.utcnow() - recent_attempt.created_at).total_seconds())
+        if last_sent_at:
+            remaining_time = 60 - int((now - last_sent_at).total_seconds())
             if remaining_time > 0:
                 print(f"❌ Cooldown active for user {user_id}: {remaining_time}s remaining")
                 raise HTTPException(
                     status_code=429,
-                    detail=f"Aguarde {remaining_time} segundos antes de solicitar um novo código",
+                    detail=COOLDOWN_DETAIL.format(seconds=remaining_time),
                     headers={"Retry-After": str(remaining_time)}
                 )
 
@@ -199,7 +215,7 @@ async def send_verification_email(
         print(f"❌ Erro ao enviar código: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor")
 
-@router.post("/verify-code")
+@router.post("/verify-code", dependencies=VERIFY_LIMITS)
 async def verify_code(
     request: VerifyCodeRequest,
     db: Session = Depends(get_db)
@@ -237,6 +253,8 @@ async def verify_code(
             print(f"✅ User {user_id} marked as verified")
 
         db.commit()
+        # O Principal em cache ainda diz is_verified=False
+        invalidate_principal(user_id)
 
         return {
             "success": True,
@@ -249,7 +267,7 @@ async def verify_code(
         print(f"❌ Erro ao verificar código: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
-@router.post("/verify-token")
+@router.post("/verify-token", dependencies=[Depends(RateLimit("verification-token-ip", 30, 900, detail=HOURLY_DETAIL))])
 async def verify_token(
     request: VerifyTokenRequest,
     db: Session = Depends(get_db)
@@ -281,6 +299,7 @@ async def verify_token(
             user.is_verified = True
 
         db.commit()
+        invalidate_principal(verification.user_id)
 
         return {
             "success": True,
@@ -1,20 +1,75 @@
 """
 Rotas de posts, reações e comentários
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import json
 
+from core.config import FEED_PRIVACY_MAX_SCANS
 from core.database import get_db
 from core.security import get_current_user
-from models import User, Post, Reaction, Comment, Share
-from schemas import PostCreate, PostResponse, ReactionCreate, CommentCreate, CommentResponse, ShareCreate
+from models import User, Post, PostDeletionJob, Comment
+from schemas import PostCreate, PostResponse, FeedPage, ViewerStateRequest, PostViewerState, ReactionCreate, CommentCreate, CommentResponse, CommentPage, ShareCreate
+from utils.pagination import encode_cursor, decode_cursor, keyset_before
+from utils.hydration import build_post_responses, build_post_response, build_comment_responses, load_viewer_states
+from utils.timeline import fan_out_post, read_timeline
+from utils.counters import post_counters
+from utils.comment_tree import load_comment_page
+from utils.post_cleanup import process_post_deletion
+from utils.reactions import upsert_reaction, delete_reaction
+from utils.profile_stats import bump_user_stats
+from utils.envelope import wants_normalized, normalized_response
+from utils.privacy import ViewerContext, get_viewer_context
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+def _query_feed_page(db: Session, viewer: ViewerContext, limit: int, cursor: Optional[str], post_type: Optional[str], privacy: Optional[str]):
+    """Busca uma página do feed em ordem (created_at DESC, id DESC) usando keyset.
+
+    Posts que o visitante não pode ver são descartados em lote; se a página
+    ficar incompleta, lê o trecho seguinte (até FEED_PRIVACY_MAX_SCANS vezes).
+    """
+    query = db.query(Post).filter(Post.deleted_at.is_(None))
+    if post_type:
+        query = query.filter(Post.post_type == post_type)
+    if privacy:
+        query = query.filter(Post.privacy == privacy)
+
+    position = decode_cursor(cursor)
+    posts, exhausted = [], False
+    for _ in range(FEED_PRIVACY_MAX_SCANS):
+        scan = query.filter(keyset_before(Post.created_at, Post.id, position)) if position else query
+        # Busca uma linha a mais para saber se existe próxima página
+        batch = scan.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+        if batch:
+            position = (batch[-1].created_at, batch[-1].id)
+        posts += viewer.filter_posts(db, batch)
+        if len(batch) <= limit:
+            exhausted = True
+            break
+        if len(posts) > limit:
+            break
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+    elif not exhausted:
+        # Página curta, mas ainda há posts depois do trecho já lido
+        next_cursor = encode_cursor(*position)
+    return posts, next_cursor
+
+def _visible_post_or_404(db: Session, viewer: ViewerContext, post_id: int) -> Post:
+    post = db.query(Post).filter(Post.id == post_id, Post.deleted_at.is_(None)).first()
+    # Post invisível para o visitante responde como inexistente
+    if not post or not viewer.can_see_post(db, post):
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post
+
 @router.post("/", response_model=PostResponse)
-async def create_post(post: PostCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_post(post: PostCreate, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     # Validação e processamento do conteúdo
     content_to_save = post.content
     
@@ -41,190 +96,210 @@ async def create_post(post: PostCreate, current_user: User = Depends(get_current
         is_cover_update=post.is_cover_update
     )
     db.add(db_post)
+    bump_user_stats(db, current_user.id, posts_count=1)
     db.commit()
     db.refresh(db_post)
+
+    # Distribuir para as timelines de amigos e seguidores depois da resposta
+    background_tasks.add_task(fan_out_post, db_post.id)
     
-    return PostResponse(
-        id=db_post.id,
-        author={
-            "id": db_post.author.id,
-            "first_name": db_post.author.first_name,
-            "last_name": db_post.author.last_name,
-            "avatar": getattr(db_post.author, 'avatar', None)
-        },
-        content=db_post.content,
-        post_type=db_post.post_type,
-        media_type=db_post.media_type,
-        media_url=db_post.media_url,
-        created_at=db_post.created_at,
-        reactions_count=db_post.reactions_count,
-        comments_count=db_post.comments_count,
-        shares_count=db_post.shares_count,
-        is_profile_update=db_post.is_profile_update,
-        is_cover_update=db_post.is_cover_update
-    )
+    return build_post_response(db, db_post)
 
 @router.get("/", response_model=List[PostResponse])
-async def get_posts(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    posts = db.query(Post).order_by(Post.created_at.desc()).limit(50).all()
-    
-    return [
-        PostResponse(
-            id=post.id,
-            author={
-                "id": post.author.id,
-                "first_name": post.author.first_name,
-                "last_name": post.author.last_name,
-                "avatar": getattr(post.author, 'avatar', None)
-            },
-            content=post.content,
-            post_type=post.post_type,
-            media_type=post.media_type,
-            media_url=post.media_url,
-            created_at=post.created_at,
-            reactions_count=post.reactions_count,
-            comments_count=post.comments_count,
-            shares_count=post.shares_count,
-            is_profile_update=post.is_profile_update,
-            is_cover_update=post.is_cover_update
-        )
-        for post in posts
-    ]
+async def get_posts(
+    limit: int = Query(50, ge=1, le=100),
+    post_type: Optional[str] = None,
+    privacy: Optional[str] = None,
+    normalized: bool = Depends(wants_normalized),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    posts, _ = _query_feed_page(db, viewer, limit, None, post_type, privacy)
+    items = build_post_responses(db, posts)
+    if normalized:
+        return normalized_response(items)
+    return items
 
-@router.get("/{post_id}", response_model=PostResponse)
-async def get_post(post_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get individual post by ID"""
-    post = db.query(Post).filter(Post.id == post_id).first()
+@router.get("/feed", response_model=FeedPage)
+async def get_feed(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    post_type: Optional[str] = None,
+    privacy: Optional[str] = None,
+    normalized: bool = Depends(wants_normalized),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    """Feed paginado por cursor opaco (created_at, id)"""
+    posts, next_cursor = _query_feed_page(db, viewer, limit, cursor, post_type, privacy)
+    items = build_post_responses(db, posts)
+    if normalized:
+        return normalized_response(items, next_cursor, paged=True)
+    return FeedPage(items=items, next_cursor=next_cursor)
 
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
+@router.get("/timeline", response_model=FeedPage)
+async def get_timeline(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    normalized: bool = Depends(wants_normalized),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    """Feed personalizado (amigos e seguidos) a partir da timeline materializada"""
+    posts, next_cursor = read_timeline(db, current_user.id, limit, cursor)
+    # A privacidade pode ter mudado depois do fan-out (post, configuração do autor ou bloqueio)
+    posts = viewer.filter_posts(db, posts)
+    items = build_post_responses(db, posts)
+    if normalized:
+        return normalized_response(items, next_cursor, paged=True)
+    return FeedPage(items=items, next_cursor=next_cursor)
 
-    return PostResponse(
-        id=post.id,
-        author={
-            "id": post.author.id,
-            "first_name": post.author.first_name,
-            "last_name": post.author.last_name,
-            "avatar": getattr(post.author, 'avatar', None)
-        },
-        content=post.content,
-        post_type=post.post_type,
-        media_type=post.media_type,
-        media_url=post.media_url,
-        created_at=post.created_at,
-        reactions_count=db.query(Reaction).filter(Reaction.post_id == post.id).count(),
-        comments_count=db.query(Comment).filter(Comment.post_id == post.id).count(),
-        shares_count=db.query(Share).filter(Share.post_id == post.id).count(),
-        is_profile_update=post.is_profile_update,
-        is_cover_update=post.is_cover_update
-    )
+@router.post("/viewer-state", response_model=List[PostViewerState])
+async def get_viewer_state(request: ViewerStateRequest, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
+    """Reação, compartilhamento e contadores do usuário atual para uma página de posts"""
+    return load_viewer_states(db, viewer, request.post_ids)
+
+@router.get("/{post_id}", response_model=PostResponse)
+async def get_post(post_id: int, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
+    """Get individual post by ID"""
+    post = _visible_post_or_404(db, viewer, post_id)
+    return build_post_response(db, post)
 
 @router.delete("/{post_id}")
-async def delete_post(post_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def delete_post(post_id: int, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    post = db.query(Post).filter(Post.id == post_id, Post.deleted_at.is_(None)).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     if post.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
     
-    # Delete related data
-    db.query(Reaction).filter(Reaction.post_id == post_id).delete()
-    db.query(Comment).filter(Comment.post_id == post_id).delete()
-    db.query(Share).filter(Share.post_id == post_id).delete()
-    
-    db.delete(post)
+    # Oculta o post imediatamente; reações, comentários etc. são removidos em lotes depois
+    post.deleted_at = datetime.utcnow()
+    job = PostDeletionJob(post_id=post_id)
+    db.add(job)
+    bump_user_stats(db, post.author_id, posts_count=-1)
     db.commit()
+
+    background_tasks.add_task(process_post_deletion, job.id)
     
     return {"message": "Post deleted successfully"}
 
 # Reactions
 @router.post("/{post_id}/reactions")
-async def create_post_reaction(post_id: int, reaction_data: ReactionCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_post_reaction(post_id: int, reaction_data: ReactionCreate, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     """Add or update reaction to a post"""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    _visible_post_or_404(db, viewer, post_id)
+    outcome, previous_type = upsert_reaction(db, post_id, current_user.id, reaction_data.reaction_type)
+    if outcome == "missing":
         raise HTTPException(status_code=404, detail="Post not found")
+    db.commit()
 
-    # Check if user already reacted
-    existing_reaction = db.query(Reaction).filter(
-        Reaction.post_id == post_id,
-        Reaction.user_id == current_user.id
-    ).first()
-
-    if existing_reaction:
-        # Update existing reaction
-        existing_reaction.reaction_type = reaction_data.reaction_type
-        db.commit()
-        return {"message": "Reaction updated"}
-    else:
-        # Create new reaction
-        reaction = Reaction(
-            post_id=post_id,
-            user_id=current_user.id,
-            reaction_type=reaction_data.reaction_type
-        )
-        db.add(reaction)
-        db.commit()
+    if outcome == "added":
+        post_counters.increment(post_id, "reactions_count")
+        post_counters.increment_reaction(post_id, reaction_data.reaction_type)
         return {"message": "Reaction added"}
 
+    if outcome == "updated":
+        post_counters.increment_reaction(post_id, previous_type, -1)
+        post_counters.increment_reaction(post_id, reaction_data.reaction_type)
+    return {"message": "Reaction updated"}
+
 @router.delete("/{post_id}/reactions")
 async def remove_post_reaction(post_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Remove reaction from a post"""
-    reaction = db.query(Reaction).filter(
-        Reaction.post_id == post_id,
-        Reaction.user_id == current_user.id
-    ).first()
-
-    if reaction:
-        db.delete(reaction)
-        db.commit()
+    reaction_type = delete_reaction(db, post_id, current_user.id)
+    db.commit()
+
+    if reaction_type:
+        post_counters.increment(post_id, "reactions_count", -1)
+        post_counters.increment_reaction(post_id, reaction_type, -1)
         return {"message": "Reaction removed"}
     else:
         raise HTTPException(status_code=404, detail="Reaction not found")
 
 # Comments
 @router.get("/{post_id}/comments", response_model=List[CommentResponse])
-async def get_post_comments(post_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_post_comments(post_id: int, normalized: bool = Depends(wants_normalized), current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     """Get comments for a specific post"""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
+    _visible_post_or_404(db, viewer, post_id)
 
     comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at.asc()).all()
+    comments = [comment for comment in comments if not viewer.is_blocked(comment.author_id)]
+
+    items = build_comment_responses(db, comments)
+    if normalized:
+        return normalized_response(items)
+    return items
+
+@router.get("/{post_id}/comments/tree", response_model=CommentPage)
+async def get_post_comment_tree(
+    post_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    replies_limit: int = Query(3, ge=1, le=50),
+    depth: int = Query(2, ge=0, le=5),
+    normalized: bool = Depends(wants_normalized),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    """Comentários de primeiro nível paginados, com respostas aninhadas limitadas por pai"""
+    _visible_post_or_404(db, viewer, post_id)
+
+    items, next_cursor = load_comment_page(db, post_id, None, limit, cursor, replies_limit, depth, viewer.blocked)
+    if normalized:
+        return normalized_response(items, next_cursor, paged=True)
+    return CommentPage(items=items, next_cursor=next_cursor)
+
+@router.get("/{post_id}/comments/{comment_id}/replies", response_model=CommentPage)
+async def get_comment_replies(
+    post_id: int,
+    comment_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    replies_limit: int = Query(3, ge=1, le=50),
+    depth: int = Query(1, ge=0, le=5),
+    normalized: bool = Depends(wants_normalized),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    """Carregar mais respostas de um comentário a partir do replies_cursor"""
+    _visible_post_or_404(db, viewer, post_id)
 
-    return [
-        CommentResponse(
-            id=comment.id,
-            content=comment.content,
-            author={
-                "id": comment.author.id,
-                "first_name": comment.author.first_name,
-                "last_name": comment.author.last_name,
-                "avatar": getattr(comment.author, 'avatar', None)
-            },
-            created_at=comment.created_at,
-            reactions_count=0
-        )
-        for comment in comments
-    ]
+    if not db.query(Comment.id).filter(Comment.id == comment_id, Comment.post_id == post_id).first():
+        raise HTTPException(status_code=404, detail="Comment not found")
+
+    items, next_cursor = load_comment_page(db, post_id, comment_id, limit, cursor, replies_limit, depth, viewer.blocked)
+    if normalized:
+        return normalized_response(items, next_cursor, paged=True)
+    return CommentPage(items=items, next_cursor=next_cursor)
 
 @router.post("/{post_id}/comments", response_model=CommentResponse)
-async def create_comment(post_id: int, comment_data: CommentCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_comment(post_id: int, comment_data: CommentCreate, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     """Create a comment on a post"""
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
+    _visible_post_or_404(db, viewer, post_id)
+
+    if comment_data.parent_id is not None:
+        parent = db.query(Comment.id).filter(Comment.id == comment_data.parent_id, Comment.post_id == post_id).first()
+        if not parent:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
 
     comment = Comment(
         content=comment_data.content,
         post_id=post_id,
-        author_id=current_user.id
+        author_id=current_user.id,
+        parent_id=comment_data.parent_id
     )
 
     db.add(comment)
     db.commit()
     db.refresh(comment)
+    post_counters.increment(post_id, "comments_count")
 
     return CommentResponse(
         id=comment.id,
@@ -236,5 +311,6 @@ async def create_comment(post_id: int, comment_data: CommentCreate, current_user
             "avatar": getattr(current_user, 'avatar', None)
         },
         created_at=comment.created_at,
-        reactions_count=0
+        reactions_count=0,
+        parent_id=comment.parent_id
     )
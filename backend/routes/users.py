@@ -1,93 +1,246 @@
 """
 Rotas de usuários e perfis
 """
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Set
 import os
 import uuid
 from pathlib import Path
 
 from core.database import get_db
-from core.security import get_current_user
-from models import User, Post, Friendship
-from schemas import UserResponse, PostResponse
+from core.security import get_current_user, invalidate_principal
+from models import User, Post, Block, Follow, FriendSuggestion
+from schemas import UserResponse, PostResponse, UserSearchResult, UserSearchPage, MutualFriendsRequest, MutualFriendsCount, FriendSuggestionResponse, PresenceRequest, PresenceStatus, FollowUser, FollowPage, FollowStatusRequest, FollowStatus
+from utils.hydration import build_post_responses
+from utils.timeline import fan_out_post
+from utils.envelope import wants_normalized, normalized_response
+from utils.profile_stats import get_user_stats, bump_user_stats, record_follow_change
+from utils.mutual_friends import mutual_count, mutual_counts, can_send_friend_request
+from utils.pagination import encode_cursor, decode_cursor, keyset_before, encode_offset_cursor, decode_offset_cursor
+from utils.user_search import ranked_search
+from utils.blocks import invalidate_blocks, blocked_ids
+from utils.presence import presence
+from utils.privacy import ViewerContext, get_viewer_context, build_viewer_context, RESTRICTED_PROFILE_FIELDS
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+def _search_page(db: Session, viewer: ViewerContext, query: str, cursor: Optional[str], limit: int):
+    """One page of the socially ranked search, served from the per-query cache"""
+    ranked = [row for row in ranked_search(db, viewer.viewer_id, query) if not viewer.is_blocked(row[0])]
+    offset = decode_offset_cursor(cursor)
+    page = ranked[offset:offset + limit]
+    next_cursor = encode_offset_cursor(offset + limit) if offset + limit < len(ranked) else None
+
+    users_by_id = {
+        user.id: user
+        for user in db.query(User).filter(User.id.in_([user_id for user_id, _, _ in page]), User.is_active == True).all()
+    } if page else {}
+    items = [
+        UserSearchResult(
+            id=user_id,
+            first_name=users_by_id[user_id].first_name,
+            last_name=users_by_id[user_id].last_name,
+            email=users_by_id[user_id].email if "email_visibility" in viewer.visible_settings(users_by_id[user_id]) else None,
+            avatar=users_by_id[user_id].avatar,
+            relation=relation,
+            mutual_friends=mutual_friends
+        )
+        for user_id, relation, mutual_friends in page
+        if user_id in users_by_id
+    ]
+    return items, next_cursor
+
+def _followed_by(db: Session, follower_id: int, user_ids: List[int]) -> Set[int]:
+    """Which of `user_ids` the follower follows: one IN query on uq_follows_pair"""
+    if not user_ids:
+        return set()
+    return {
+        row[0] for row in db.query(Follow.followed_id).filter(
+            Follow.follower_id == follower_id,
+            Follow.followed_id.in_(user_ids)
+        ).all()
+    }
+
+def _follow_page(db: Session, viewer: ViewerContext, user_id: int, followers: bool, cursor: Optional[str], limit: int) -> FollowPage:
+    """Page of followers (or followed users) in (created_at DESC, id DESC) keyset order"""
+    if viewer.is_blocked(user_id) or not db.query(User.id).filter(User.id == user_id, User.is_active == True).first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    owner_column, other_column = (Follow.followed_id, Follow.follower_id) if followers else (Follow.follower_id, Follow.followed_id)
+    query = db.query(other_column, Follow.created_at, Follow.id).filter(owner_column == user_id)
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(keyset_before(Follow.created_at, Follow.id, position))
+    rows = query.order_by(Follow.created_at.desc(), Follow.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    rows = [row for row in rows if not viewer.is_blocked(row[0])]
+    user_ids = [row[0] for row in rows]
+    users_by_id = {
+        user.id: user
+        for user in db.query(User.id, User.first_name, User.last_name, User.avatar).filter(
+            User.id.in_(user_ids),
+            User.is_active == True
+        ).all()
+    } if user_ids else {}
+    following = _followed_by(db, viewer.viewer_id, user_ids)
+
+    items = [
+        FollowUser(
+            id=other_id,
+            first_name=users_by_id[other_id].first_name,
+            last_name=users_by_id[other_id].last_name,
+            avatar=users_by_id[other_id].avatar,
+            followed_at=followed_at,
+            is_following=other_id in following
+        )
+        for other_id, followed_at, _ in rows
+        if other_id in users_by_id
+    ]
+    return FollowPage(items=items, next_cursor=next_cursor)
+
 @router.get("/")
 async def search_users(search: str = "", current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if not search.strip():
         return []
-    
-    users = db.query(User).filter(
-        User.is_active == True,
-        User.id != current_user.id,
-        (User.first_name.ilike(f"%{search}%") | User.last_name.ilike(f"%{search}%") | User.email.ilike(f"%{search}%"))
-    ).limit(20).all()
-    
+
+    items, _ = _search_page(db, build_viewer_context(db, current_user.id), search, None, 20)
+    return items
+
+@router.get("/search", response_model=UserSearchPage)
+async def search_users_paged(
+    q: str = "",
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Busca ranqueada por proximidade social (amigos, amigos em comum, seguidos, demais)"""
+    if not q.strip():
+        return UserSearchPage(items=[])
+
+    items, next_cursor = _search_page(db, build_viewer_context(db, current_user.id), q, cursor, limit)
+    return UserSearchPage(items=items, next_cursor=next_cursor)
+
+@router.post("/mutual-friends", response_model=List[MutualFriendsCount])
+async def get_mutual_friends_counts(request: MutualFriendsRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Quantidade de amigos em comum com cada usuário de uma página (lista, busca, sugestões)"""
+    counts = mutual_counts(db, current_user.id, request.user_ids)
+    return [MutualFriendsCount(user_id=user_id, mutual_friends=count) for user_id, count in counts.items()]
+
+@router.post("/presence", response_model=List[PresenceStatus])
+async def get_presence(request: PresenceRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Quem está online numa lista de usuários (lista de amigos, chat)"""
+    hidden = blocked_ids(db, current_user.id)
+    user_ids = [user_id for user_id in dict.fromkeys(request.user_ids) if user_id not in hidden]
+    statuses = presence.statuses(user_ids)
+
+    # last_seen do banco só para quem não teve atividade recente neste processo
+    missing = [user_id for user_id, (_, last_seen) in statuses.items() if last_seen is None]
+    stored = dict(db.query(User.id, User.last_seen).filter(User.id.in_(missing)).all()) if missing else {}
+
     return [
-        {
-            "id": user.id,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "avatar": getattr(user, 'avatar', None)
-        }
-        for user in users
+        PresenceStatus(user_id=user_id, is_online=online, last_seen=last_seen or stored.get(user_id))
+        for user_id, (online, last_seen) in statuses.items()
     ]
 
+@router.post("/follow-status", response_model=List[FollowStatus])
+async def get_follow_status(request: FollowStatusRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Sigo / me segue para uma página de perfis, com duas consultas IN"""
+    user_ids = list(dict.fromkeys(request.user_ids))
+    following = _followed_by(db, current_user.id, user_ids)
+    followers = {
+        row[0] for row in db.query(Follow.follower_id).filter(
+            Follow.follower_id.in_(user_ids),
+            Follow.followed_id == current_user.id
+        ).all()
+    } if user_ids else set()
+    return [
+        FollowStatus(user_id=user_id, is_following=user_id in following, follows_you=user_id in followers)
+        for user_id in user_ids
+    ]
+
+@router.post("/me/heartbeat")
+async def heartbeat(current_user: User = Depends(get_current_user)):
+    """Manter o usuário online sem websocket aberto"""
+    presence.touch(current_user.id)
+    return {"online": True}
+
+@router.get("/suggestions", response_model=List[FriendSuggestionResponse])
+async def get_friend_suggestions(limit: int = Query(10, ge=1, le=50), current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
+    """Pessoas que você talvez conheça (pré-calculadas pela tarefa em lote)"""
+    suggestions = db.query(FriendSuggestion.suggested_user_id, FriendSuggestion.mutual_friends).filter(
+        FriendSuggestion.user_id == current_user.id
+    ).order_by(FriendSuggestion.position).limit(limit * 2).all()
+    if not suggestions:
+        return []
+
+    users_by_id = {
+        user.id: user
+        for user in db.query(User).filter(
+            User.id.in_([row.suggested_user_id for row in suggestions]),
+            User.is_active == True
+        ).all()
+    }
+
+    results = []
+    for row in suggestions:
+        user = users_by_id.get(row.suggested_user_id)
+        # Descarta quem virou amigo ou foi bloqueado depois da última execução
+        if not user or viewer.is_blocked(user.id) or user.id in viewer.friends:
+            continue
+        results.append(FriendSuggestionResponse(
+            id=user.id,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            avatar=user.avatar,
+            mutual_friends=row.mutual_friends
+        ))
+        if len(results) == limit:
+            break
+    return results
+
 @router.get("/{user_id}")
-async def get_user_by_id(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_by_id(user_id: int, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    if not user:
+    if not user or viewer.is_blocked(user_id):
         raise HTTPException(status_code=404, detail="User not found")
-    
+
+    # Mesmas regras de /{user_id}/profile: campos não permitidos voltam como null
+    visible = viewer.visible_settings(user)
     return {
         "id": user.id,
         "first_name": user.first_name,
         "last_name": user.last_name,
-        "email": user.email,
-        "bio": getattr(user, 'bio', None),
-        "avatar": getattr(user, 'avatar', None),
-        "birth_date": user.birth_date.isoformat() if user.birth_date else None,
+        "email": user.email if "email_visibility" in visible else None,
+        "bio": user.bio if "profile_visibility" in visible else None,
+        "avatar": user.avatar,
+        "birth_date": user.birth_date.isoformat() if user.birth_date and "birth_date_visibility" in visible else None,
         "created_at": user.created_at.isoformat()
     }
 
 @router.get("/{user_id}/profile")
-async def get_user_profile(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_profile(user_id: int, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     """Obter perfil completo do usuário com configurações de privacidade"""
     user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-    if not user:
+    if not user or viewer.is_blocked(user_id):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Verificar se são amigos para mostrar informações privadas
-    friendship = db.query(Friendship).filter(
-        ((Friendship.requester_id == current_user.id) & (Friendship.addressee_id == user_id)) |
-        ((Friendship.requester_id == user_id) & (Friendship.addressee_id == current_user.id)),
-        Friendship.status == "accepted"
-    ).first()
-
-    is_friend = friendship is not None
     is_own_profile = current_user.id == user_id
+    is_friend = not is_own_profile and user_id in viewer.friends
 
-    # Calcular estatísticas
-    friends_count = db.query(Friendship).filter(
-        ((Friendship.requester_id == user_id) | (Friendship.addressee_id == user_id)),
-        Friendship.status == "accepted"
-    ).count()
+    # Estatísticas pré-calculadas (user_stats), sem COUNT por visualização
+    stats = get_user_stats(db, user_id)
 
-    posts_count = db.query(Post).filter(Post.author_id == user_id).count()
-
-    # Determinar visibilidade das informações com base nas configurações de privacidade
-    def can_see_field(field_visibility):
-        if is_own_profile:
-            return True
-        if field_visibility == "public":
-            return True
-        if field_visibility == "friends" and is_friend:
-            return True
-        return False
+    # Configurações de visibilidade avaliadas de uma vez para este visitante
+    visible = viewer.visible_settings(user)
 
     response_data = {
         "id": user.id,
@@ -105,87 +258,147 @@ async def get_user_profile(user_id: int, current_user: User = Depends(get_curren
         "education": user.education,
         "is_verified": user.is_verified,
         "created_at": user.created_at.isoformat(),
-        "friends_count": friends_count,
-        "posts_count": posts_count,
+        "friends_count": stats["friends_count"],
+        "posts_count": stats["posts_count"],
+        "followers_count": stats["followers_count"],
+        "following_count": stats["following_count"],
+        "mutual_friends_count": 0 if is_own_profile else mutual_count(db, current_user.id, user_id),
+        "can_send_friend_request": not is_friend and can_send_friend_request(db, current_user.id, user),
         "is_own_profile": is_own_profile,
-        "is_friend": is_friend
+        "is_friend": is_friend,
+        "is_restricted": "profile_visibility" not in visible
     }
 
+    # Perfil restrito: mantém só o cartão básico (nome, foto, contadores)
+    if "profile_visibility" not in visible:
+        for field in RESTRICTED_PROFILE_FIELDS:
+            response_data[field] = None
+
     # Adicionar campos sensíveis apenas se permitido pelas configurações de privacidade
-    if can_see_field(user.email_visibility):
+    if "email_visibility" in visible:
         response_data["email"] = user.email
 
-    if can_see_field(user.phone_visibility):
+    if "phone_visibility" in visible:
         response_data["phone"] = user.phone
 
-    if can_see_field(user.birth_date_visibility):
+    if "birth_date_visibility" in visible:
         response_data["birth_date"] = user.birth_date.isoformat() if user.birth_date else None
         response_data["gender"] = user.gender
 
     return response_data
 
 @router.get("/{user_id}/posts", response_model=List[PostResponse])
-async def get_user_posts(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_posts(user_id: int, normalized: bool = Depends(wants_normalized), current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     posts = db.query(Post).filter(
         Post.author_id == user_id,
-        Post.post_type == "post"
+        Post.post_type == "post",
+        Post.deleted_at.is_(None)
     ).order_by(Post.created_at.desc()).limit(50).all()
     
-    return [
-        PostResponse(
-            id=post.id,
-            author={
-                "id": post.author.id,
-                "first_name": post.author.first_name,
-                "last_name": post.author.last_name,
-                "avatar": getattr(post.author, 'avatar', None)
-            },
-            content=post.content,
-            post_type=post.post_type,
-            media_type=post.media_type,
-            media_url=post.media_url,
-            created_at=post.created_at,
-            reactions_count=0,
-            comments_count=0,
-            shares_count=0,
-            is_profile_update=post.is_profile_update,
-            is_cover_update=post.is_cover_update
-        )
-        for post in posts
-    ]
+    items = build_post_responses(db, viewer.filter_posts(db, posts))
+    if normalized:
+        return normalized_response(items)
+    return items
 
 @router.get("/{user_id}/testimonials", response_model=List[PostResponse])
-async def get_user_testimonials(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_testimonials(user_id: int, normalized: bool = Depends(wants_normalized), current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
     testimonials = db.query(Post).filter(
         Post.author_id == user_id,
-        Post.post_type == "testimonial"
+        Post.post_type == "testimonial",
+        Post.deleted_at.is_(None)
     ).order_by(Post.created_at.desc()).limit(50).all()
     
-    return [
-        PostResponse(
-            id=post.id,
-            author={
-                "id": post.author.id,
-                "first_name": post.author.first_name,
-                "last_name": post.author.last_name,
-                "avatar": getattr(post.author, 'avatar', None)
-            },
-            content=post.content,
-            post_type=post.post_type,
-            media_type=post.media_type,
-            media_url=post.media_url,
-            created_at=post.created_at,
-            reactions_count=0,
-            comments_count=0,
-            shares_count=0,
-            is_profile_update=post.is_profile_update,
-            is_cover_update=post.is_cover_update
-        )
-        for post in testimonials
-    ]
+    items = build_post_responses(db, viewer.filter_posts(db, testimonials))
+    if normalized:
+        return normalized_response(items)
+    return items
+
+@router.post("/{user_id}/follow")
+async def follow_user(user_id: int, current_user: User = Depends(get_current_user), viewer: ViewerContext = Depends(get_viewer_context), db: Session = Depends(get_db)):
+    """Seguir um usuário"""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="You cannot follow yourself")
+    if viewer.is_blocked(user_id) or not db.query(User.id).filter(User.id == user_id, User.is_active == True).first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if db.query(Follow.id).filter(Follow.follower_id == current_user.id, Follow.followed_id == user_id).first():
+        return {"message": "Already following"}
+    try:
+        db.add(Follow(follower_id=current_user.id, followed_id=user_id))
+        db.flush()
+        record_follow_change(db, current_user.id, user_id, 1)
+        db.commit()
+    except IntegrityError:
+        # Dois pedidos simultâneos: uq_follows_pair deixa só um passar
+        db.rollback()
+        return {"message": "Already following"}
+    return {"message": "User followed"}
+
+@router.delete("/{user_id}/follow")
+async def unfollow_user(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Deixar de seguir um usuário"""
+    deleted = db.query(Follow).filter(Follow.follower_id == current_user.id, Follow.followed_id == user_id).delete(synchronize_session=False)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Not following this user")
+    record_follow_change(db, current_user.id, user_id, -1)
+    db.commit()
+    return {"message": "User unfollowed"}
+
+@router.get("/{user_id}/followers", response_model=FollowPage)
+async def get_followers(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    """Seguidores do usuário, mais recentes primeiro"""
+    return _follow_page(db, viewer, user_id, True, cursor, limit)
+
+@router.get("/{user_id}/following", response_model=FollowPage)
+async def get_following(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    viewer: ViewerContext = Depends(get_viewer_context),
+    db: Session = Depends(get_db)
+):
+    """Quem o usuário segue, mais recentes primeiro"""
+    return _follow_page(db, viewer, user_id, False, cursor, limit)
+
+@router.post("/{user_id}/block")
+async def block_user(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Bloquear um usuário"""
+    if user_id == current_user.id:
+        raise HTTPException(status_code=400, detail="You cannot block yourself")
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    exists = db.query(Block.id).filter(Block.blocker_id == current_user.id, Block.blocked_id == user_id).first()
+    if not exists:
+        db.add(Block(blocker_id=current_user.id, blocked_id=user_id))
+        # Bloqueio desfaz os follows nos dois sentidos
+        for follower_id, followed_id in ((current_user.id, user_id), (user_id, current_user.id)):
+            if db.query(Follow).filter(Follow.follower_id == follower_id, Follow.followed_id == followed_id).delete(synchronize_session=False):
+                record_follow_change(db, follower_id, followed_id, -1)
+        db.commit()
+    invalidate_blocks(current_user.id, user_id)
+    return {"message": "User blocked"}
+
+@router.delete("/{user_id}/block")
+async def unblock_user(user_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Desbloquear um usuário"""
+    deleted = db.query(Block).filter(Block.blocker_id == current_user.id, Block.blocked_id == user_id).delete(synchronize_session=False)
+    db.commit()
+    invalidate_blocks(current_user.id, user_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Block not found")
+    return {"message": "User unblocked"}
 
 @router.post("/me/avatar")
-async def upload_user_avatar(file: UploadFile = File(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def upload_user_avatar(background_tasks: BackgroundTasks, file: UploadFile = File(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Upload e definir avatar do usuário"""
     
     # Validar se é imagem
@@ -213,7 +426,7 @@ async def upload_user_avatar(file: UploadFile = File(...), current_user: User =
 
         # Atualizar avatar do usuário
         avatar_url = f"/uploads/image/{unique_filename}"
-        current_user.avatar = avatar_url
+        db.query(User).filter(User.id == current_user.id).update({"avatar": avatar_url}, synchronize_session=False)
 
         # Criar post automático sobre a atualização da foto de perfil
         from models.post import Post
@@ -227,7 +440,10 @@ async def upload_user_avatar(file: UploadFile = File(...), current_user: User =
             is_profile_update=True
         )
         db.add(profile_post)
+        bump_user_stats(db, current_user.id, posts_count=1)
         db.commit()
+        invalidate_principal(current_user.id)
+        background_tasks.add_task(fan_out_post, profile_post.id)
 
         return {
             "message": "Avatar updated successfully",
@@ -238,7 +454,7 @@ async def upload_user_avatar(file: UploadFile = File(...), current_user: User =
         raise HTTPException(status_code=500, detail=f"Failed to upload avatar: {str(e)}")
 
 @router.post("/me/cover")
-async def upload_user_cover_photo(file: UploadFile = File(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def upload_user_cover_photo(background_tasks: BackgroundTasks, file: UploadFile = File(...), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Upload e definir foto de capa do usuário"""
     
     # Validar se é imagem
@@ -266,7 +482,7 @@ async def upload_user_cover_photo(file: UploadFile = File(...), current_user: Us
 
         # Atualizar foto de capa do usuário
         cover_url = f"/uploads/image/{unique_filename}"
-        current_user.cover_photo = cover_url
+        db.query(User).filter(User.id == current_user.id).update({"cover_photo": cover_url}, synchronize_session=False)
 
         # Criar post automático sobre a atualização da foto de capa
         from models.post import Post
@@ -280,7 +496,10 @@ async def upload_user_cover_photo(file: UploadFile = File(...), current_user: Us
             is_cover_update=True
         )
         db.add(cover_post)
+        bump_user_stats(db, current_user.id, posts_count=1)
         db.commit()
+        invalidate_principal(current_user.id)
+        background_tasks.add_task(fan_out_post, cover_post.id)
 
         return {
             "message": "Cover photo updated successfully",
@@ -0,0 +1,59 @@
+"""
+Canal WebSocket do usuário: presença, indicador de digitação e confirmação de leitura
+"""
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
+
+from core.database import SessionLocal
+from core.security import verify_websocket_token
+from models import Message
+from utils.websocket import manager
+
+router = APIRouter(tags=["websocket"])
+
+def _message_sender(message_id, reader_id: int):
+    """Sender of a message addressed to `reader_id`, or None"""
+    db = SessionLocal()
+    try:
+        return db.query(Message.sender_id).filter(
+            Message.id == message_id,
+            Message.recipient_id == reader_id
+        ).scalar()
+    finally:
+        db.close()
+
+@router.websocket("/ws/{user_id}")
+async def websocket_endpoint(websocket: WebSocket, user_id: int, token: str = Query(...)):
+    """Conexão aberta conta como online; cada quadro recebido renova a presença"""
+    principal = verify_websocket_token(token)
+    if principal is None or principal.id != user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await manager.connect(websocket, user_id)
+    try:
+        while True:
+            try:
+                data = await websocket.receive_json()
+            except ValueError:
+                continue
+            manager.heartbeat(user_id)
+            if not isinstance(data, dict):
+                continue
+
+            kind = data.get("type")
+            if kind == "typing" and isinstance(data.get("recipient_id"), int):
+                await manager.send_typing_indicator(data["recipient_id"], {
+                    "sender_id": user_id,
+                    "is_typing": bool(data.get("is_typing"))
+                })
+            elif kind == "message_read" and data.get("message_id") is not None:
+                sender_id = _message_sender(data["message_id"], user_id)
+                if sender_id is not None:
+                    await manager.send_message_read(sender_id, {
+                        "message_id": data["message_id"],
+                        "reader_id": user_id
+                    })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(websocket, user_id)
@@ -1,14 +1,17 @@
 """
 Schemas/DTOs da aplicação
 """
-from .auth import LoginRequest, Token, PasswordUpdate
+from .auth import LoginRequest, Token, PasswordUpdate, RefreshRequest, SessionResponse
 from .user import (
     UserBase, UserCreate, UserResponse, UserProfileUpdate,
-    PrivacySettings, NotificationSettings
+    PrivacySettings, NotificationSettings, UserSearchResult, UserSearchPage,
+    MutualFriendsRequest, MutualFriendsCount, FriendSuggestionResponse,
+    PresenceRequest, PresenceStatus,
+    FollowUser, FollowPage, FollowStatusRequest, FollowStatus
 )
 from .post import (
-    PostCreate, PostResponse, ReactionCreate, 
-    CommentCreate, CommentResponse, ShareCreate
+    PostCreate, PostResponse, FeedPage, ViewerStateRequest, PostViewerState, ReactionCreate, 
+    CommentCreate, CommentResponse, CommentPage, ShareCreate
 )
 from .story import (
     StoryCreate, StoryResponse, StoryTagCreate,
@@ -22,13 +25,16 @@ from .misc import (
 
 __all__ = [
     # Auth
-    "LoginRequest", "Token", "PasswordUpdate",
+    "LoginRequest", "Token", "PasswordUpdate", "RefreshRequest", "SessionResponse",
     # User
     "UserBase", "UserCreate", "UserResponse", "UserProfileUpdate",
-    "PrivacySettings", "NotificationSettings",
+    "PrivacySettings", "NotificationSettings", "UserSearchResult", "UserSearchPage",
+    "MutualFriendsRequest", "MutualFriendsCount", "FriendSuggestionResponse",
+    "PresenceRequest", "PresenceStatus",
+    "FollowUser", "FollowPage", "FollowStatusRequest", "FollowStatus",
     # Post
-    "PostCreate", "PostResponse", "ReactionCreate", 
-    "CommentCreate", "CommentResponse", "ShareCreate",
+    "PostCreate", "PostResponse", "FeedPage", "ViewerStateRequest", "PostViewerState", "ReactionCreate", 
+    "CommentCreate", "CommentResponse", "CommentPage", "ShareCreate",
     # Story
     "StoryCreate", "StoryResponse", "StoryTagCreate",
     "StoryOverlayCreate", "StoryWithEditor",
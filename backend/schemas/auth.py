@@ -2,6 +2,8 @@
 Schemas de autenticação
 """
 from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
 
 class LoginRequest(BaseModel):
     email: str
@@ -10,6 +12,17 @@ class LoginRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class SessionResponse(BaseModel):
+    family_id: str
+    device: Optional[str] = None
+    created_at: datetime
+    last_used_at: datetime
+    expires_at: datetime
 
 class PasswordUpdate(BaseModel):
     current_password: str
@@ -1,7 +1,7 @@
 """
 Schemas de posts
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -26,12 +26,28 @@ class PostResponse(BaseModel):
     reactions_count: int
     comments_count: int
     shares_count: int
+    reaction_counts: Dict[str, int] = {}  # por tipo, em ordem decrescente
     is_profile_update: Optional[bool] = False
     is_cover_update: Optional[bool] = False
     
     class Config:
         from_attributes = True
 
+class FeedPage(BaseModel):
+    items: List[PostResponse]
+    next_cursor: Optional[str] = None
+
+class ViewerStateRequest(BaseModel):
+    post_ids: List[int] = Field(..., max_length=300)
+
+class PostViewerState(BaseModel):
+    post_id: int
+    reaction_type: Optional[str] = None
+    shared: bool = False
+    reactions_count: int
+    comments_count: int
+    shares_count: int
+
 class ReactionCreate(BaseModel):
     post_id: int
     reaction_type: str
@@ -47,10 +63,17 @@ class CommentResponse(BaseModel):
     author: Dict[str, Any]
     created_at: datetime
     reactions_count: int = 0
+    parent_id: Optional[int] = None
     replies: List['CommentResponse'] = []
+    has_more_replies: bool = False
+    replies_cursor: Optional[str] = None  # continua a partir da última resposta exibida
     
     class Config:
         from_attributes = True
 
+class CommentPage(BaseModel):
+    items: List[CommentResponse]
+    next_cursor: Optional[str] = None
+
 class ShareCreate(BaseModel):
     post_id: int
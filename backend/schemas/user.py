@@ -1,8 +1,8 @@
 """
 Schemas de usuário
 """
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Union
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional, Union
 from datetime import datetime, date
 
 class UserBase(BaseModel):
@@ -86,3 +86,58 @@ class NotificationSettings(BaseModel):
     reaction_notifications: Optional[bool] = None
     message_notifications: Optional[bool] = None
     story_notifications: Optional[bool] = None
+
+class UserSearchResult(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    email: Optional[str] = None  # só quando email_visibility permite
+    avatar: Optional[str] = None
+    relation: str = "other"  # friend, mutual, following, other
+    mutual_friends: int = 0
+
+class UserSearchPage(BaseModel):
+    items: List[UserSearchResult]
+    next_cursor: Optional[str] = None
+
+class MutualFriendsRequest(BaseModel):
+    user_ids: List[int] = Field(..., max_length=300)
+
+class MutualFriendsCount(BaseModel):
+    user_id: int
+    mutual_friends: int
+
+class FriendSuggestionResponse(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    avatar: Optional[str] = None
+    mutual_friends: int
+
+class PresenceRequest(BaseModel):
+    user_ids: List[int] = Field(..., max_length=300)
+
+class PresenceStatus(BaseModel):
+    user_id: int
+    is_online: bool
+    last_seen: Optional[datetime] = None
+
+class FollowUser(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    avatar: Optional[str] = None
+    followed_at: datetime
+    is_following: bool = False  # o usuário atual segue esta pessoa
+
+class FollowPage(BaseModel):
+    items: List[FollowUser]
+    next_cursor: Optional[str] = None
+
+class FollowStatusRequest(BaseModel):
+    user_ids: List[int] = Field(..., max_length=300)
+
+class FollowStatus(BaseModel):
+    user_id: int
+    is_following: bool
+    follows_you: bool
@@ -0,0 +1,57 @@
+"""
+Fixtures compartilhadas: app com banco SQLite em memória e contador de SQL
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from core.database import Base, get_db
+
+class AppDatabase:
+    """Fresh in-memory database wired into the app, recording executed SQL"""
+
+    def __init__(self):
+        self.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        main.app.dependency_overrides[get_db] = self._get_db
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _get_db(self):
+        db = self.Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+@pytest.fixture
+def make_database():
+    """Factory: each call swaps the app onto a new empty database"""
+    databases = []
+
+    def make():
+        databases.append(AppDatabase())
+        return databases[-1]
+
+    yield make
+    main.app.dependency_overrides.clear()
+    for database in databases:
+        database.engine.dispose()
+
+@pytest.fixture
+def client():
+    # Sem "with": o lifespan (agendador, pools) não sobe nos testes
+    return TestClient(main.app)
@@ -0,0 +1,36 @@
+"""
+O feed custa um número fixo de consultas, qualquer que seja o tamanho da página
+"""
+import main
+from core.security import Principal, get_current_user
+from models import User, Post
+from utils.blocks import _block_cache
+
+def _seed(database, post_count: int) -> Principal:
+    db = database.Session()
+    # Um autor diferente por post: um N+1 de autores apareceria na contagem
+    for i in range(1, post_count + 2):
+        db.add(User(id=i, first_name=f"First{i}", last_name=f"Last{i}", email=f"u{i}@x.com", password_hash="x"))
+    for i in range(2, post_count + 2):
+        db.add(Post(author_id=i, content=f"post {i}", post_type="text", privacy="public"))
+    db.commit()
+
+    viewer = db.get(User, 1)
+    principal = Principal(**{column: getattr(viewer, column) for column in Principal.COLUMNS})
+    db.close()
+    return principal
+
+def _feed_statements(client, make_database, post_count: int) -> int:
+    database = make_database()
+    viewer = _seed(database, post_count)
+    main.app.dependency_overrides[get_current_user] = lambda: viewer
+    _block_cache.clear()
+
+    # Primeira chamada aquece os caches por processo (bloqueios, amizades)
+    assert len(client.get("/posts/", params={"limit": 100}).json()) == post_count
+    database.statements.clear()
+    assert len(client.get("/posts/", params={"limit": 100}).json()) == post_count
+    return len(database.statements)
+
+def test_feed_query_count_is_constant(client, make_database):
+    assert _feed_statements(client, make_database, 5) == _feed_statements(client, make_database, 50)
@@ -0,0 +1,79 @@
+"""
+Rate limiter: limite exato, Retry-After da janela deslizante e cooldowns
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from core.rate_limit import MemoryBackend, RateLimit, body_field, rate_limiter
+
+# Início de uma janela de 60s: o peso da janela anterior fica fácil de conferir
+START = 600.0
+
+def test_limit_is_reached_exactly_at_n():
+    backend = MemoryBackend(100)
+    for _ in range(5):
+        assert backend.hit("k", 5, 60, START) == (True, 0)
+    assert not backend.hit("k", 5, 60, START)[0]
+    # Outra chave tem a própria cota
+    assert backend.hit("other", 5, 60, START) == (True, 0)
+
+def test_retry_after_is_when_weighted_count_drops_below_limit():
+    backend = MemoryBackend(100)
+    for _ in range(5):
+        backend.hit("k", 5, 60, START)
+
+    # Janela seguinte, 1s depois: a anterior ainda pesa 5 * 59/60, cabe só aos 12s (5 * 48/60 + 1 = 5)
+    assert backend.hit("k", 5, 60, START + 61) == (False, 11)
+    assert backend.hit("k", 5, 60, START + 71) == (False, 1)
+    assert backend.hit("k", 5, 60, START + 72) == (True, 0)
+
+def test_retry_after_when_current_window_alone_is_full():
+    backend = MemoryBackend(100)
+    for _ in range(5):
+        backend.hit("k", 5, 60, START)
+
+    allowed, retry_after = backend.hit("k", 5, 60, START)
+    assert (allowed, retry_after) == (False, 72)
+    assert not backend.hit("k", 5, 60, START + retry_after - 1)[0]
+    assert backend.hit("k", 5, 60, START + retry_after)[0]
+
+def test_cooldown_rejects_second_hit_inside_window():
+    backend = MemoryBackend(100)
+    assert backend.hit("k", 1, 60, START + 30) == (True, 0)
+    assert backend.hit("k", 1, 60, START + 40) == (False, 50)
+    assert backend.hit("k", 1, 60, START + 89.5) == (False, 1)
+    # Exato: libera uma janela após o último pedido, mesmo atravessando o limite da janela fixa
+    assert backend.hit("k", 1, 60, START + 90) == (True, 0)
+
+class _Login(BaseModel):
+    email: str
+
+@pytest.fixture
+def limited_client():
+    app = FastAPI()
+
+    @app.post("/login", dependencies=[Depends(RateLimit("test-email", 2, 60, key=body_field("email")))])
+    def login(data: _Login):
+        return {"email": data.email}
+
+    rate_limiter.backend.clear()
+    yield TestClient(app)
+    rate_limiter.backend.clear()
+
+def test_dependency_keys_on_body_and_sets_retry_after(limited_client):
+    for _ in range(2):
+        response = limited_client.post("/login", json={"email": "A@x.com"})
+        assert response.status_code == 200
+        # O corpo lido pela chave continua disponível para a rota
+        assert response.json() == {"email": "A@x.com"}
+
+    # Mesmo e-mail com outra caixa cai na mesma chave
+    response = limited_client.post("/login", json={"email": " a@x.com"})
+    assert response.status_code == 429
+    retry_after = int(response.headers["Retry-After"])
+    assert 1 <= retry_after <= 120
+    assert str(retry_after) in response.json()["detail"]
+
+    assert limited_client.post("/login", json={"email": "b@x.com"}).status_code == 200
@@ -0,0 +1,57 @@
+"""
+Rotação de refresh tokens: reuso derruba a família, vencidos e revogados não valem
+"""
+from datetime import datetime, timedelta
+
+from models import User, RefreshToken
+from utils.refresh_tokens import issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+
+def _session_with_token(make_database):
+    database = make_database()
+    db = database.Session()
+    db.add(User(id=1, first_name="First", last_name="Last", email="u1@x.com", password_hash="x"))
+    db.commit()
+    token = issue_refresh_token(db, 1, "pytest")
+    db.commit()
+    return db, token
+
+def _live_tokens(db) -> int:
+    return db.query(RefreshToken).filter(RefreshToken.revoked_at.is_(None)).count()
+
+def test_rotation_issues_next_token_in_family(make_database):
+    db, token = _session_with_token(make_database)
+
+    user_id, email, new_token = rotate_refresh_token(db, token)
+
+    assert (user_id, email) == (1, "u1@x.com")
+    assert new_token != token
+    assert db.query(RefreshToken.family_id).distinct().count() == 1
+    assert _live_tokens(db) == 1
+    db.close()
+
+def test_reusing_rotated_token_revokes_family(make_database):
+    db, token = _session_with_token(make_database)
+    _, _, new_token = rotate_refresh_token(db, token)
+
+    assert rotate_refresh_token(db, token) is None
+    assert _live_tokens(db) == 0
+    # O token legítimo mais recente também caiu junto com a família
+    assert rotate_refresh_token(db, new_token) is None
+    db.close()
+
+def test_expired_token_is_rejected(make_database):
+    db, token = _session_with_token(make_database)
+    db.query(RefreshToken).update({RefreshToken.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    assert rotate_refresh_token(db, token) is None
+    db.close()
+
+def test_revoked_token_is_rejected(make_database):
+    db, token = _session_with_token(make_database)
+    assert revoke_refresh_token(db, token)
+    db.commit()
+
+    assert rotate_refresh_token(db, token) is None
+    assert rotate_refresh_token(db, "never-issued") is None
+    db.close()
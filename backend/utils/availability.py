@@ -0,0 +1,188 @@
+"""
+Filtros de Bloom de e-mails e usernames já usados (checagens de disponibilidade no cadastro)
+
+"Não está no filtro" garante que o valor está livre, sem consulta ao banco; um
+possível acerto (inclusive falso positivo) é confirmado no banco. As chaves são
+normalizadas como a collation do MySQL compara (sem caixa, acentos ou espaços
+nas pontas), então valores iguais para o banco caem sempre nos mesmos bits.
+Cadastros feitos em outros workers entram a cada AVAILABILITY_FILTER_CHECK_SECONDS
+(varredura por users.id); o cadastro em si continua validado no banco.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import func
+
+from core.config import AVAILABILITY_FILTER_FALSE_POSITIVE_RATE
+from core.database import SessionLocal
+from models import User
+from utils.user_search import normalize
+
+# Capacidade mínima e folga para crescer entre reconstruções
+MIN_CAPACITY = 10000
+CAPACITY_HEADROOM = 2
+
+def _key(value: str) -> str:
+    # ASCII (quase todos os e-mails) dispensa a decomposição de acentos
+    return value.lower().strip() if value.isascii() else normalize(value)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for `capacity` keys at `false_positive_rate`"""
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Hash duplo: h1 + i*h2 a partir de um único digest de 128 bits
+        digest = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest(), "little")
+        first, second = digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+class TakenNames:
+    """Emails and usernames already in use, rebuilt from users in the background"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._emails: Optional[BloomFilter] = None
+        self._usernames: Optional[BloomFilter] = None
+        self._journal: Optional[List[Tuple[str, str]]] = None
+        self.loaded_at = 0.0
+        # Maior users.id já incluído; cadastros acima dele entram na próxima verificação
+        self.max_user_id = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._emails is not None
+
+    def begin_rebuild(self):
+        """Start journaling additions, to be replayed on top of the next build"""
+        with self._lock:
+            self._journal = []
+
+    def cancel_rebuild(self):
+        # Os cadastros do diário já foram aplicados aos filtros atuais
+        with self._lock:
+            self._journal = None
+
+    def build(self, rows: Iterable[Tuple[Optional[str], Optional[str]]], expected: int, false_positive_rate: float):
+        """Replace both filters from (email, username) rows; checks keep using the old ones until the swap"""
+        capacity = max(expected * CAPACITY_HEADROOM, MIN_CAPACITY)
+        emails = BloomFilter(capacity, false_positive_rate)
+        usernames = BloomFilter(capacity, false_positive_rate)
+        for email, username in rows:
+            if email:
+                emails.add(_key(email))
+            if username:
+                usernames.add(_key(username))
+
+        with self._lock:
+            # Cadastros feitos enquanto os novos filtros eram montados
+            journal, self._journal = self._journal or [], None
+            for kind, key in journal:
+                (emails if kind == "email" else usernames).add(key)
+            self._emails, self._usernames = emails, usernames
+            self.loaded_at = time.monotonic()
+
+    def _add(self, kind: str, value: Optional[str]):
+        if not value:
+            return
+        key = _key(value)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((kind, key))
+            target = self._emails if kind == "email" else self._usernames
+            if target is not None:
+                target.add(key)
+
+    def add_email(self, email: Optional[str]):
+        self._add("email", email)
+
+    def add_username(self, username: Optional[str]):
+        """Call after a username is set or changed (the old one stays in the filter until the next rebuild)"""
+        self._add("username", username)
+
+    def might_have_email(self, email: str) -> bool:
+        """False means the email is certainly free; True must be confirmed in the database"""
+        emails = self._emails
+        return emails is None or _key(email) in emails
+
+    def might_have_username(self, username: str) -> bool:
+        usernames = self._usernames
+        return usernames is None or _key(username) in usernames
+
+    def memory_bytes(self) -> int:
+        return sum(bloom.memory_bytes() for bloom in (self._emails, self._usernames) if bloom is not None)
+
+    def needs_rebuild(self) -> bool:
+        """Filters are full (false positives rising) or never built"""
+        emails, usernames = self._emails, self._usernames
+        if emails is None or usernames is None:
+            return True
+        return max(emails.count, usernames.count) > emails.capacity
+
+taken_names = TakenNames()
+
+def _rebuild(db):
+    started = time.perf_counter()
+    taken_names.begin_rebuild()
+    # Lido antes da varredura: quem se cadastrar durante ela entra pelo diário ou pelo próximo delta
+    max_user_id = db.query(func.max(User.id)).scalar() or 0
+    expected = db.query(User).count()
+    rows = db.query(User.email, User.username).yield_per(10000)
+    taken_names.build(rows, expected, AVAILABILITY_FILTER_FALSE_POSITIVE_RATE)
+    taken_names.max_user_id = max_user_id
+    print(f"🌸 Filtros de disponibilidade carregados ({expected} usuários, "
+          f"{taken_names.memory_bytes() // 1024} KB) em {time.perf_counter() - started:.1f}s")
+
+def _add_new_users(db):
+    """Users registered since the last run, on any worker: a range scan on the primary key"""
+    rows = db.query(User.id, User.email, User.username).filter(
+        User.id > taken_names.max_user_id
+    ).order_by(User.id).all()
+    for row in rows:
+        taken_names.add_email(row.email)
+        taken_names.add_username(row.username)
+    if rows:
+        taken_names.max_user_id = rows[-1].id
+
+def refresh_taken_names(force: bool = False):
+    """Scheduled job: build the filters at startup, then add new registrations each run
+    and rebuild once the filters fill up.
+
+    Username changes made through this process call add_username directly.
+    """
+    db = SessionLocal()
+    try:
+        if force or taken_names.needs_rebuild():
+            _rebuild(db)
+        else:
+            _add_new_users(db)
+    except Exception as e:
+        print(f"❌ Erro ao atualizar filtros de disponibilidade: {e}")
+        db.rollback()
+        taken_names.cancel_rebuild()
+    finally:
+        db.close()
@@ -0,0 +1,57 @@
+"""
+Cache das relações de bloqueio por usuário (nos dois sentidos)
+
+Feed, comentários, busca e mensagens consultam o conjunto em memória em vez de
+um NOT EXISTS por consulta; bloquear ou desbloquear invalida os dois usuários.
+"""
+import threading
+from typing import FrozenSet, Optional
+from sqlalchemy.orm import Session
+
+from core.cache import TTLCache
+from core.config import BLOCK_CACHE_SECONDS, BLOCK_CACHE_MAX_USERS
+from core.database import SessionLocal
+from models import Block
+
+_block_cache = TTLCache(BLOCK_CACHE_SECONDS, max_size=BLOCK_CACHE_MAX_USERS)
+
+# Incrementado a cada invalidação: uma carga que começou antes não grava um conjunto velho
+_generation_lock = threading.Lock()
+_generation = {"value": 0}
+
+def _load(db: Session, user_id: int) -> FrozenSet[int]:
+    as_blocker = db.query(Block.blocked_id).filter(Block.blocker_id == user_id)
+    as_blocked = db.query(Block.blocker_id).filter(Block.blocked_id == user_id)
+    return frozenset(row[0] for row in as_blocker.union(as_blocked).all())
+
+def blocked_ids(db: Optional[Session], user_id: int) -> FrozenSet[int]:
+    """Users the given user blocked or was blocked by; opens a session on a miss if `db` is None"""
+    cached = _block_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    generation = _generation["value"]
+    if db is None:
+        session = SessionLocal()
+        try:
+            ids = _load(session, user_id)
+        finally:
+            session.close()
+    else:
+        ids = _load(db, user_id)
+
+    with _generation_lock:
+        if generation == _generation["value"]:
+            _block_cache.set(user_id, ids)
+    return ids
+
+def is_blocked(db: Optional[Session], user_id: int, other_id: int) -> bool:
+    """True when there is a block between the two users, in either direction"""
+    return user_id != other_id and other_id in blocked_ids(db, user_id)
+
+def invalidate_blocks(user_id: int, other_id: int):
+    """Call after a block between the two users is created or removed"""
+    with _generation_lock:
+        _generation["value"] += 1
+        _block_cache.pop(user_id)
+        _block_cache.pop(other_id)
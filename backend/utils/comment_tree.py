@@ -0,0 +1,105 @@
+"""
+Montagem da árvore de comentários com paginação por nível
+"""
+from typing import AbstractSet, Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models import Comment
+from schemas import CommentResponse
+from utils.hydration import load_authors, author_payload
+from utils.pagination import encode_cursor, decode_cursor, keyset_after
+
+def _capped_replies(db: Session, parent_ids: List[int], replies_limit: int) -> Dict[int, List[Comment]]:
+    """First `replies_limit + 1` replies of each parent, in one windowed query"""
+    position = func.row_number().over(
+        partition_by=Comment.parent_id,
+        order_by=(Comment.created_at, Comment.id)
+    ).label("position")
+    ranked = select(Comment.id, position).where(Comment.parent_id.in_(parent_ids)).subquery()
+
+    replies = db.query(Comment).join(ranked, Comment.id == ranked.c.id).filter(
+        ranked.c.position <= replies_limit + 1
+    ).order_by(Comment.parent_id, Comment.created_at, Comment.id).all()
+
+    grouped: Dict[int, List[Comment]] = {}
+    for reply in replies:
+        grouped.setdefault(reply.parent_id, []).append(reply)
+    return grouped
+
+def load_comment_page(
+    db: Session,
+    post_id: int,
+    parent_id: Optional[int],
+    limit: int,
+    cursor: Optional[str],
+    replies_limit: int,
+    depth: int,
+    hidden_authors: AbstractSet[int] = frozenset()
+) -> Tuple[List[CommentResponse], Optional[str]]:
+    """Load one page of comments under `parent_id` (None = top level) with nested replies.
+
+    Costs one query for the page, one per reply level and one for authors,
+    no matter how many comments the post has. Comments by `hidden_authors`
+    (and their replies) are dropped in memory; cursors still point past them.
+    """
+    query = db.query(Comment).filter(Comment.post_id == post_id)
+    if parent_id is None:
+        query = query.filter(Comment.parent_id.is_(None))
+    else:
+        query = query.filter(Comment.parent_id == parent_id)
+
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(keyset_after(Comment.created_at, Comment.id, position))
+
+    roots = query.order_by(Comment.created_at.asc(), Comment.id.asc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(roots) > limit:
+        roots = roots[:limit]
+        next_cursor = encode_cursor(roots[-1].created_at, roots[-1].id)
+    roots = [comment for comment in roots if comment.author_id not in hidden_authors]
+
+    children: Dict[int, List[Comment]] = {}
+    more_replies: Dict[int, Optional[str]] = {}
+    nodes = list(roots)
+    level = roots
+    for current_depth in range(depth + 1):
+        if not level:
+            break
+        parent_ids = [comment.id for comment in level]
+
+        if current_depth == depth:
+            # Último nível: só descobre quem tem respostas para o cliente buscar depois
+            with_replies = db.query(Comment.parent_id).filter(Comment.parent_id.in_(parent_ids)).distinct().all()
+            for row in with_replies:
+                more_replies[row[0]] = None
+            break
+
+        grouped = _capped_replies(db, parent_ids, replies_limit)
+        level = []
+        for parent, replies in grouped.items():
+            if len(replies) > replies_limit:
+                replies = replies[:replies_limit]
+                more_replies[parent] = encode_cursor(replies[-1].created_at, replies[-1].id)
+            replies = [reply for reply in replies if reply.author_id not in hidden_authors]
+            children[parent] = replies
+            level.extend(replies)
+        nodes.extend(level)
+
+    authors = load_authors(db, (comment.author_id for comment in nodes))
+
+    def build(comment: Comment) -> CommentResponse:
+        return CommentResponse(
+            id=comment.id,
+            content=comment.content,
+            author=author_payload(authors, comment.author_id),
+            created_at=comment.created_at,
+            reactions_count=0,
+            parent_id=comment.parent_id,
+            replies=[build(reply) for reply in children.get(comment.id, [])],
+            has_more_replies=comment.id in more_replies,
+            replies_cursor=more_replies.get(comment.id)
+        )
+
+    return [build(comment) for comment in roots], next_cursor
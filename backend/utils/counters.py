@@ -0,0 +1,221 @@
+"""
+Contadores de posts mantidos na escrita (buffer em memória + flush em lote + reconciliação)
+
+Inclui o histograma por tipo de reação (post_reaction_counts).
+"""
+import threading
+from typing import Dict, Iterable
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.mysql import insert
+
+from core.config import POST_COUNTER_RECONCILE_BATCH_SIZE, POST_COUNTER_RECONCILE_BATCHES_PER_RUN
+from core.database import SessionLocal
+from models import Post, Reaction, PostReactionCount, Comment, Share
+
+COUNTER_FIELDS = ("reactions_count", "comments_count", "shares_count")
+
+class PostCounterBuffer:
+    """Pending counter deltas per post, waiting to be flushed to `posts`"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, int]] = {}
+        # Deltas do histograma por tipo de reação: post_id -> {reaction_type: delta}
+        self._reactions: Dict[int, Dict[str, int]] = {}
+
+    def increment(self, post_id: int, field: str, delta: int = 1):
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter: {field}")
+        with self._lock:
+            deltas = self._pending.setdefault(post_id, dict.fromkeys(COUNTER_FIELDS, 0))
+            deltas[field] += delta
+
+    def increment_reaction(self, post_id: int, reaction_type: str, delta: int = 1):
+        with self._lock:
+            deltas = self._reactions.setdefault(post_id, {})
+            deltas[reaction_type] = deltas.get(reaction_type, 0) + delta
+
+    def pending_reactions_for(self, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        with self._lock:
+            return {post_id: dict(self._reactions[post_id]) for post_id in post_ids if post_id in self._reactions}
+
+    def pending_for(self, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """Deltas not yet flushed, so reads can be exact without COUNT(*)"""
+        with self._lock:
+            return {post_id: dict(self._pending[post_id]) for post_id in post_ids if post_id in self._pending}
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            reactions, self._reactions = self._reactions, {}
+            return pending, reactions
+
+    def restore(self, pending: Dict[int, Dict[str, int]], reactions: Dict[int, Dict[str, int]]):
+        """Put back deltas from a failed flush"""
+        with self._lock:
+            for post_id, deltas in pending.items():
+                current = self._pending.setdefault(post_id, dict.fromkeys(COUNTER_FIELDS, 0))
+                for field, delta in deltas.items():
+                    current[field] += delta
+            for post_id, deltas in reactions.items():
+                current = self._reactions.setdefault(post_id, {})
+                for reaction_type, delta in deltas.items():
+                    current[reaction_type] = current.get(reaction_type, 0) + delta
+
+# Instância global do buffer
+post_counters = PostCounterBuffer()
+
+_posts = Post.__table__
+_increment_statement = update(_posts).where(_posts.c.id == bindparam("b_id")).values(
+    reactions_count=func.coalesce(_posts.c.reactions_count, 0) + bindparam("b_reactions"),
+    comments_count=func.coalesce(_posts.c.comments_count, 0) + bindparam("b_comments"),
+    shares_count=func.coalesce(_posts.c.shares_count, 0) + bindparam("b_shares")
+)
+
+_histogram_insert = insert(PostReactionCount.__table__)
+_histogram_increment_statement = _histogram_insert.on_duplicate_key_update(
+    count=PostReactionCount.__table__.c.count + _histogram_insert.inserted.count
+)
+_histogram_set_statement = _histogram_insert.on_duplicate_key_update(
+    count=_histogram_insert.inserted.count
+)
+
+# Flush e reconciliação rodam em threads diferentes do agendador: a reconciliação
+# não pode gravar valores absolutos enquanto um flush tem deltas drenados e não
+# commitados (eles não estão mais no buffer nem ainda na tabela). O lock é por
+# processo: com vários workers, um lote pode gravar o valor absoluto enquanto outro
+# worker ainda segura deltas; esse desvio só é corrigido na próxima passada
+_write_lock = threading.Lock()
+
+def flush_post_counters():
+    """Apply buffered deltas with one batched atomic statement per table (executemany)"""
+    with _write_lock:
+        _flush_post_counters()
+
+def _flush_post_counters():
+    pending, reactions = post_counters.drain()
+    rows = [
+        {
+            "b_id": post_id,
+            "b_reactions": deltas["reactions_count"],
+            "b_comments": deltas["comments_count"],
+            "b_shares": deltas["shares_count"]
+        }
+        for post_id, deltas in pending.items()
+        if any(deltas.values())
+    ]
+    histogram_rows = [
+        {"post_id": post_id, "reaction_type": reaction_type, "count": delta}
+        for post_id, deltas in reactions.items()
+        for reaction_type, delta in deltas.items()
+        if delta
+    ]
+    if not rows and not histogram_rows:
+        return
+
+    db = SessionLocal()
+    try:
+        if rows:
+            db.execute(_increment_statement, rows)
+        if histogram_rows:
+            db.execute(_histogram_increment_statement, histogram_rows)
+        db.commit()
+    except Exception as e:
+        print(f"❌ Erro ao gravar contadores de posts: {e}")
+        db.rollback()
+        post_counters.restore(pending, reactions)
+    finally:
+        db.close()
+
+_reconcile_state = {"last_id": 0}
+
+def _grouped_counts(db, model, post_ids):
+    rows = db.query(model.post_id, func.count(model.id)).filter(model.post_id.in_(post_ids)).group_by(model.post_id).all()
+    return dict(rows)
+
+def _reconcile_histogram(db, post_ids) -> int:
+    """Rewrite histogram rows that differ from the reactions table"""
+    truth = {}
+    for post_id, reaction_type, count in db.query(
+        Reaction.post_id, Reaction.reaction_type, func.count(Reaction.id)
+    ).filter(Reaction.post_id.in_(post_ids)).group_by(Reaction.post_id, Reaction.reaction_type).all():
+        truth[(post_id, reaction_type)] = count
+
+    stored = {
+        (row.post_id, row.reaction_type): row.count
+        for row in db.query(PostReactionCount).filter(PostReactionCount.post_id.in_(post_ids)).all()
+    }
+    pending = post_counters.pending_reactions_for(post_ids)
+
+    rows = []
+    for key in set(truth) | set(stored):
+        post_id, reaction_type = key
+        expected = truth.get(key, 0) - pending.get(post_id, {}).get(reaction_type, 0)
+        if stored.get(key, 0) != expected:
+            rows.append({"post_id": post_id, "reaction_type": reaction_type, "count": expected})
+    if rows:
+        db.execute(_histogram_set_statement, rows)
+    return len(rows)
+
+def _reconcile_batch(db):
+    """Check the next batch of posts; None when the walk wrapped around"""
+    posts = db.query(Post.id, Post.reactions_count, Post.comments_count, Post.shares_count).filter(
+        Post.id > _reconcile_state["last_id"]
+    ).order_by(Post.id).limit(POST_COUNTER_RECONCILE_BATCH_SIZE).all()
+
+    if not posts:
+        _reconcile_state["last_id"] = 0
+        return None
+    _reconcile_state["last_id"] = posts[-1].id
+
+    post_ids = [post.id for post in posts]
+    reactions = _grouped_counts(db, Reaction, post_ids)
+    comments = _grouped_counts(db, Comment, post_ids)
+    shares = _grouped_counts(db, Share, post_ids)
+    pending = post_counters.pending_for(post_ids)
+
+    fixed = 0
+    for post in posts:
+        # O valor gravado mais o que ainda está no buffer deve bater com a fonte
+        deltas = pending.get(post.id, dict.fromkeys(COUNTER_FIELDS, 0))
+        expected = {
+            "reactions_count": reactions.get(post.id, 0) - deltas["reactions_count"],
+            "comments_count": comments.get(post.id, 0) - deltas["comments_count"],
+            "shares_count": shares.get(post.id, 0) - deltas["shares_count"]
+        }
+        current = {field: getattr(post, field) for field in COUNTER_FIELDS}
+        if current != expected:
+            db.query(Post).filter(Post.id == post.id).update(expected, synchronize_session=False)
+            fixed += 1
+    fixed += _reconcile_histogram(db, post_ids)
+    db.commit()
+    return fixed
+
+def reconcile_post_counters():
+    """Fix counter drift from the source tables.
+
+    Walks `posts` by id in batches, a few batches per run, and wraps around at
+    the end, so every post is eventually checked without one huge scan. Each
+    batch holds the flush lock, so a flush waits for at most one batch. Deltas
+    buffered by other worker processes are not covered by the lock; the drift
+    they cause is fixed on the next pass over the same batch.
+    """
+    flush_post_counters()
+
+    db = SessionLocal()
+    try:
+        fixed = 0
+        for _ in range(POST_COUNTER_RECONCILE_BATCHES_PER_RUN):
+            with _write_lock:
+                batch_fixed = _reconcile_batch(db)
+            if batch_fixed is None:
+                break
+            fixed += batch_fixed
+
+        if fixed:
+            print(f"🔧 {fixed} contadores de posts corrigidos")
+    except Exception as e:
+        print(f"❌ Erro na reconciliação de contadores: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,36 @@
+"""
+Formato de resposta normalizado: itens com author_id + um único mapa de usuários
+"""
+from typing import Any, Dict, List, Optional
+from fastapi import Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+NORMALIZED_MEDIA_TYPE = "application/vnd.vibe.normalized+json"
+
+def wants_normalized(request: Request, response: Response, format: Optional[str] = Query(None)) -> bool:
+    """Dependency: opt in with ?format=normalized or the Accept header"""
+    # O formato depende de Accept nas duas formas da resposta; o JSONResponse
+    # normalizado define o seu próprio cabeçalho, a forma antiga herda este
+    response.headers["Vary"] = "Accept"
+    if format == "normalized":
+        return True
+    return NORMALIZED_MEDIA_TYPE in request.headers.get("accept", "")
+
+def _flatten(item: BaseModel, users: Dict[str, Any]) -> Dict[str, Any]:
+    author = item.author
+    users[str(author["id"])] = author
+
+    data = item.model_dump(mode="json", exclude={"author", "replies"})
+    data["author_id"] = author["id"]
+    if hasattr(item, "replies"):
+        data["replies"] = [_flatten(reply, users) for reply in item.replies]
+    return data
+
+def normalized_response(items: List[BaseModel], next_cursor: Optional[str] = None, paged: bool = False) -> JSONResponse:
+    """Build the normalized envelope for posts or comments (nested replies included)"""
+    users: Dict[str, Any] = {}
+    body: Dict[str, Any] = {"items": [_flatten(item, users) for item in items], "users": users}
+    if paged:
+        body["next_cursor"] = next_cursor
+    return JSONResponse(content=body, headers={"Vary": "Accept"})
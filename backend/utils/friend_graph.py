@@ -0,0 +1,243 @@
+"""
+Grafo de amizades em memória (adjacência CSR em arrays de inteiros ordenados)
+
+`offsets[u]..offsets[u + 1]` delimita em `neighbors` os amigos de `u`, em ordem
+crescente. Alterações depois da carga ficam numa pequena camada de delta
+(adicionados/removidos) que a tarefa periódica compacta no CSR quando cresce demais.
+"""
+import bisect
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import FRIEND_GRAPH_REBUILD_SECONDS, FRIEND_GRAPH_MAX_DELTA
+from core.database import SessionLocal
+from models import Friendship
+
+class FriendGraph:
+    """Undirected friendship graph; reads are a bisect over one node's neighbor slice"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._offsets = array("q", [0])
+        self._neighbors = array("i")
+        self._added: Dict[int, Set[int]] = {}
+        self._removed: Dict[int, Set[int]] = {}
+        self._delta_size = 0
+        self._journal: Optional[List[Tuple[int, int, bool]]] = None
+        self.edge_count = 0
+        self.ready = False
+        self.loaded_at = 0.0
+        self.watermark: Optional[datetime] = None
+
+    @staticmethod
+    def _compile(edges: Iterable[Tuple[int, int]]) -> Tuple[array, array, int]:
+        """Build (offsets, neighbors, edge_count) from undirected edges in two passes"""
+        sources, targets = array("i"), array("i")
+        for user_id, other_id in edges:
+            if user_id != other_id:
+                sources.append(user_id)
+                targets.append(other_id)
+
+        max_id = max(max(sources, default=0), max(targets, default=0))
+        degrees = array("q", bytes(8 * (max_id + 2)))
+        for user_id, other_id in zip(sources, targets):
+            degrees[user_id + 1] += 1
+            degrees[other_id + 1] += 1
+        for position in range(1, len(degrees)):
+            degrees[position] += degrees[position - 1]
+        offsets = degrees
+
+        neighbors = array("i", bytes(4 * offsets[-1]))
+        cursor = array("q", offsets)
+        for user_id, other_id in zip(sources, targets):
+            neighbors[cursor[user_id]] = other_id
+            cursor[user_id] += 1
+            neighbors[cursor[other_id]] = user_id
+            cursor[other_id] += 1
+
+        # Ordena cada fatia e remove arestas duplicadas (mesma amizade nas duas direções)
+        compacted = array("i")
+        compacted_offsets = array("q", bytes(8 * len(offsets)))
+        for user_id in range(len(offsets) - 1):
+            start, end = offsets[user_id], offsets[user_id + 1]
+            if end > start:
+                previous = None
+                for other_id in sorted(neighbors[start:end]):
+                    if other_id != previous:
+                        compacted.append(other_id)
+                        previous = other_id
+            compacted_offsets[user_id + 1] = len(compacted)
+        return compacted_offsets, compacted, len(compacted) // 2
+
+    def begin_rebuild(self):
+        """Start journaling edge changes, to be replayed on top of the next build"""
+        with self._lock:
+            self._journal = []
+
+    def build(self, edges: Iterable[Tuple[int, int]], watermark: Optional[datetime] = None):
+        """Replace the graph with `edges`; readers keep using the old arrays until the swap"""
+        swapped = False
+        try:
+            offsets, neighbors, edge_count = self._compile(edges)
+            with self._lock:
+                self._offsets, self._neighbors, self.edge_count = offsets, neighbors, edge_count
+                self._added, self._removed, self._delta_size = {}, {}, 0
+                # Mudanças feitas enquanto o novo CSR era montado
+                journal, self._journal = self._journal or [], None
+                for user_id, other_id, present in journal:
+                    if present != self._has(user_id, other_id):
+                        self._set_edge(user_id, other_id, present)
+                        self.edge_count += 1 if present else -1
+                self.watermark = watermark
+                self.loaded_at = time.monotonic()
+                self.ready = True
+                swapped = True
+        finally:
+            if not swapped:
+                # Montagem falhou: o diário já está aplicado ao grafo atual, e deixá-lo
+                # ativo desligaria a compactação para sempre
+                with self._lock:
+                    self._journal = None
+
+    def _base_has(self, user_id: int, other_id: int) -> bool:
+        if user_id + 1 >= len(self._offsets):
+            return False
+        start, end = self._offsets[user_id], self._offsets[user_id + 1]
+        position = bisect.bisect_left(self._neighbors, other_id, start, end)
+        return position < end and self._neighbors[position] == other_id
+
+    def _has(self, user_id: int, other_id: int) -> bool:
+        if other_id in self._added.get(user_id, ()):
+            return True
+        if other_id in self._removed.get(user_id, ()):
+            return False
+        return self._base_has(user_id, other_id)
+
+    def are_friends(self, user_id: int, other_id: int) -> bool:
+        with self._lock:
+            return self._has(user_id, other_id)
+
+    def friends_of(self, user_id: int) -> List[int]:
+        """Sorted friend ids of a user"""
+        with self._lock:
+            if user_id + 1 < len(self._offsets):
+                friends = self._neighbors[self._offsets[user_id]:self._offsets[user_id + 1]].tolist()
+            else:
+                friends = []
+            removed = self._removed.get(user_id)
+            added = self._added.get(user_id)
+        if removed:
+            friends = [other_id for other_id in friends if other_id not in removed]
+        if added:
+            friends = sorted(set(friends) | added)
+        return friends
+
+    def degree(self, user_id: int) -> int:
+        with self._lock:
+            base = self._offsets[user_id + 1] - self._offsets[user_id] if user_id + 1 < len(self._offsets) else 0
+            return base + len(self._added.get(user_id, ())) - len(self._removed.get(user_id, ()))
+
+    def _set_edge(self, user_id: int, other_id: int, present: bool):
+        if self._journal is not None:
+            self._journal.append((user_id, other_id, present))
+        for source, target in ((user_id, other_id), (other_id, user_id)):
+            if present:
+                self._removed.get(source, set()).discard(target)
+                if not self._base_has(source, target):
+                    self._added.setdefault(source, set()).add(target)
+            else:
+                self._added.get(source, set()).discard(target)
+                if self._base_has(source, target):
+                    self._removed.setdefault(source, set()).add(target)
+        self._delta_size += 1
+
+    def add_edge(self, user_id: int, other_id: int):
+        """Apply an accepted friendship"""
+        if user_id == other_id:
+            return
+        with self._lock:
+            if not self._has(user_id, other_id):
+                self._set_edge(user_id, other_id, True)
+                self.edge_count += 1
+
+    def remove_edge(self, user_id: int, other_id: int):
+        """Apply an unfriend (or a friendship that stopped being accepted)"""
+        with self._lock:
+            if self._has(user_id, other_id):
+                self._set_edge(user_id, other_id, False)
+                self.edge_count -= 1
+
+    def compact(self):
+        """Fold the delta layer back into the CSR arrays without blocking readers"""
+        with self._lock:
+            if not self._delta_size or self._journal is not None:
+                return
+            # Os arrays nunca são alterados no lugar, só trocados: basta guardar a referência
+            offsets, neighbors = self._offsets, self._neighbors
+            added = {user_id: set(others) for user_id, others in self._added.items()}
+            removed = {user_id: set(others) for user_id, others in self._removed.items()}
+            watermark, loaded_at = self.watermark, self.loaded_at
+            self._journal = []
+
+        def edges():
+            for user_id in range(len(offsets) - 1):
+                dropped = removed.get(user_id, ())
+                for other_id in neighbors[offsets[user_id]:offsets[user_id + 1]]:
+                    if user_id < other_id and other_id not in dropped:
+                        yield user_id, other_id
+            for user_id, others in added.items():
+                for other_id in others:
+                    if user_id < other_id:
+                        yield user_id, other_id
+
+        self.build(edges(), watermark)
+        self.loaded_at = loaded_at
+
+    @property
+    def delta_size(self) -> int:
+        return self._delta_size
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the CSR arrays (the delta layer is bounded separately)"""
+        return self._offsets.itemsize * len(self._offsets) + self._neighbors.itemsize * len(self._neighbors)
+
+# Instância global do grafo
+friend_graph = FriendGraph()
+
+def refresh_friend_graph():
+    """Load the graph at startup, then apply friendships changed since the last run.
+
+    Unfriending deletes the row, which no delta query can see, so the graph is
+    also fully rebuilt every FRIEND_GRAPH_REBUILD_SECONDS. Changes made through
+    this process are applied immediately with add_edge / remove_edge.
+    """
+    db = SessionLocal()
+    try:
+        started_at = datetime.utcnow()
+        if not friend_graph.ready or time.monotonic() - friend_graph.loaded_at > FRIEND_GRAPH_REBUILD_SECONDS:
+            rows = db.query(Friendship.requester_id, Friendship.addressee_id).filter(
+                Friendship.status == "accepted"
+            ).yield_per(50000)
+            friend_graph.begin_rebuild()
+            friend_graph.build(((row[0], row[1]) for row in rows), watermark=started_at)
+            print(f"🕸️ Grafo de amizades carregado ({friend_graph.edge_count} amizades, "
+                  f"{friend_graph.memory_bytes() // 1024} KB)")
+            return
+
+        changed = db.query(Friendship.requester_id, Friendship.addressee_id, Friendship.status).filter(
+            Friendship.updated_at >= friend_graph.watermark - timedelta(seconds=5)
+        ).all()
+        for row in changed:
+            if row.status == "accepted":
+                friend_graph.add_edge(row.requester_id, row.addressee_id)
+            else:
+                friend_graph.remove_edge(row.requester_id, row.addressee_id)
+        friend_graph.watermark = started_at
+
+        if friend_graph.delta_size > FRIEND_GRAPH_MAX_DELTA:
+            friend_graph.compact()
+    finally:
+        db.close()
@@ -0,0 +1,160 @@
+"""
+"Pessoas que você talvez conheça": vizinhos em comum via produto de matrizes esparsas
+
+A matriz de adjacência A (CSR, simétrica) vem das amizades aceitas. Para uma
+faixa de usuários, A[início:fim] @ A dá o número de amigos em comum com cada
+outro usuário. As faixas são calculadas em processos separados e o processo
+principal grava o top-K de cada usuário em friend_suggestions.
+"""
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from core.config import (
+    FRIEND_SUGGESTIONS_TOP_K,
+    FRIEND_SUGGESTIONS_SHARD_SIZE,
+    FRIEND_SUGGESTIONS_WORKERS
+)
+from core.database import SessionLocal
+from models import Friendship, Block, FriendSuggestion
+
+# Matrizes da execução atual; nos processos filhos chegam uma única vez pelo initializer
+_matrices = {"adjacency": None, "excluded": None}
+
+def _init_worker(adjacency, excluded):
+    _matrices["adjacency"], _matrices["excluded"] = adjacency, excluded
+
+def _pairs(db: Session, query) -> Tuple[np.ndarray, np.ndarray]:
+    sources, targets = [], []
+    for source, target in query.yield_per(100000):
+        sources.append(source)
+        targets.append(target)
+    return np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+
+def _symmetric(sources: np.ndarray, targets: np.ndarray, size: int) -> sparse.csr_matrix:
+    """Binary symmetric CSR matrix with an entry for each pair in both directions"""
+    rows = np.concatenate([sources, targets])
+    cols = np.concatenate([targets, sources])
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(size, size))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def build_matrices(db: Session) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+    """Adjacency of accepted friendships, and the pairs that must never be suggested.
+
+    Excluded: existing friends, any other friendship row (pending or
+    rejected requests), blocks in either direction, and the user itself.
+    """
+    friends = _pairs(db, db.query(Friendship.requester_id, Friendship.addressee_id).filter(Friendship.status == "accepted"))
+    requests = _pairs(db, db.query(Friendship.requester_id, Friendship.addressee_id).filter(Friendship.status != "accepted"))
+    blocks = _pairs(db, db.query(Block.blocker_id, Block.blocked_id))
+
+    size = int(max([array.max() for pair in (friends, requests, blocks) for array in pair if len(array)], default=0)) + 1
+    adjacency = _symmetric(*friends, size)
+    excluded = adjacency + _symmetric(*requests, size) + _symmetric(*blocks, size) + sparse.identity(size, dtype=np.int32, format="csr")
+    return adjacency, excluded.tocsr()
+
+def score_shard(start: int, end: int, top_k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Top-K suggestions for users in [start, end) as (user_ids, suggested_ids, mutual_friends, positions)"""
+    adjacency, excluded = _matrices["adjacency"], _matrices["excluded"]
+    scores = (adjacency[start:end] @ adjacency).tocsr()
+    # Zera os pares excluídos: subtrai a própria contagem nas posições da máscara
+    scores = (scores - scores.multiply(excluded[start:end] > 0)).tocsr()
+    scores.eliminate_zeros()
+
+    coo = scores.tocoo()
+    if not coo.nnz:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    # Ordena por (usuário, mais amigos em comum, menor id) e fica com as K primeiras de cada linha
+    order = np.lexsort((coo.col, -coo.data, coo.row))
+    rows, cols, data = coo.row[order], coo.col[order], coo.data[order]
+    row_starts = np.searchsorted(rows, rows, side="left")
+    positions = np.arange(len(rows)) - row_starts
+    keep = positions < top_k
+    return (rows[keep] + start).astype(np.int64), cols[keep].astype(np.int64), data[keep].astype(np.int64), positions[keep]
+
+def _save_shard(db: Session, shard, generated_at: datetime, start: int, end: int) -> int:
+    user_ids, suggested_ids, mutual_friends, positions = shard
+    rows = [
+        {
+            "user_id": int(user_id),
+            "suggested_user_id": int(suggested_id),
+            "mutual_friends": int(mutual),
+            "position": int(position),
+            "generated_at": generated_at
+        }
+        for user_id, suggested_id, mutual, position in zip(user_ids, suggested_ids, mutual_friends, positions)
+    ]
+    for offset in range(0, len(rows), 5000):
+        statement = insert(FriendSuggestion)
+        db.execute(statement.on_duplicate_key_update(
+            mutual_friends=statement.inserted.mutual_friends,
+            position=statement.inserted.position,
+            generated_at=statement.inserted.generated_at
+        ), rows[offset:offset + 5000])
+
+    # Remove o que sobrou da geração anterior só depois de gravar a nova (sem janela vazia)
+    db.query(FriendSuggestion).filter(
+        FriendSuggestion.user_id >= start,
+        FriendSuggestion.user_id < end,
+        FriendSuggestion.generated_at < generated_at
+    ).delete(synchronize_session=False)
+    db.commit()
+    return len(rows)
+
+def generate_friend_suggestions(workers: Optional[int] = None, shard_size: Optional[int] = None, top_k: Optional[int] = None):
+    """Recompute every user's suggestions, sharded by user-id range across worker processes"""
+    workers = FRIEND_SUGGESTIONS_WORKERS if workers is None else workers
+    shard_size = shard_size or FRIEND_SUGGESTIONS_SHARD_SIZE
+    top_k = top_k or FRIEND_SUGGESTIONS_TOP_K
+
+    started = time.perf_counter()
+    generated_at = datetime.utcnow().replace(microsecond=0)
+    db = SessionLocal()
+    try:
+        adjacency, excluded = build_matrices(db)
+        _matrices["adjacency"], _matrices["excluded"] = adjacency, excluded
+        size = adjacency.shape[0]
+        shards = [(start, min(start + shard_size, size)) for start in range(0, size, shard_size)]
+
+        saved = 0
+        if workers > 1 and len(shards) > 1:
+            # spawn: a tarefa roda numa thread do servidor, e fork com threads ativas não é seguro
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(adjacency, excluded)
+            ) as pool:
+                results = pool.map(score_shard, *zip(*[(start, end, top_k) for start, end in shards]))
+                for (start, end), shard in zip(shards, results):
+                    saved += _save_shard(db, shard, generated_at, start, end)
+        else:
+            for start, end in shards:
+                saved += _save_shard(db, score_shard(start, end, top_k), generated_at, start, end)
+
+        # Usuários além da última faixa (sem nenhuma amizade hoje)
+        db.query(FriendSuggestion).filter(
+            FriendSuggestion.user_id >= size,
+            FriendSuggestion.generated_at < generated_at
+        ).delete(synchronize_session=False)
+        db.commit()
+        print(f"🤝 {saved} sugestões de amizade geradas ({adjacency.nnz // 2} amizades, "
+              f"{len(shards)} faixas) em {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        print(f"❌ Erro ao gerar sugestões de amizade: {e}")
+        db.rollback()
+    finally:
+        _matrices["adjacency"], _matrices["excluded"] = None, None
+        db.close()
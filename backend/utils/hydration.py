@@ -0,0 +1,139 @@
+"""
+Montagem de respostas de posts e comentários com autores carregados em lote
+"""
+from typing import Any, Dict, Iterable, List
+from sqlalchemy.orm import Session
+
+from models import User, Post, Reaction, PostReactionCount, Comment, Share
+from schemas import PostResponse, CommentResponse, PostViewerState
+from utils.counters import post_counters
+from utils.privacy import ViewerContext
+
+def load_authors(db: Session, user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Load the public author payload for many users with a single IN query"""
+    ids = set(user_ids)
+    if not ids:
+        return {}
+
+    rows = db.query(User.id, User.first_name, User.last_name, User.avatar).filter(User.id.in_(ids)).all()
+    return {
+        row.id: {
+            "id": row.id,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "avatar": row.avatar
+        }
+        for row in rows
+    }
+
+def author_payload(authors: Dict[int, Dict[str, Any]], user_id: int) -> Dict[str, Any]:
+    # Autor removido: devolve apenas o id em vez de quebrar a página inteira
+    return authors.get(user_id) or {"id": user_id, "first_name": None, "last_name": None, "avatar": None}
+
+def _counter(post: Post, pending: Dict[int, Dict[str, int]], field: str) -> int:
+    # Valor gravado + incrementos ainda no buffer de write-behind
+    return (getattr(post, field) or 0) + pending.get(post.id, {}).get(field, 0)
+
+def load_reaction_counts(db: Session, post_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """Per-type reaction histogram for many posts with a single query, sorted by count"""
+    ids = set(post_ids)
+    if not ids:
+        return {}
+
+    histograms: Dict[int, Dict[str, int]] = {}
+    for row in db.query(PostReactionCount).filter(PostReactionCount.post_id.in_(ids), PostReactionCount.count > 0).all():
+        histograms.setdefault(row.post_id, {})[row.reaction_type] = row.count
+
+    for post_id, deltas in post_counters.pending_reactions_for(ids).items():
+        histogram = histograms.setdefault(post_id, {})
+        for reaction_type, delta in deltas.items():
+            histogram[reaction_type] = histogram.get(reaction_type, 0) + delta
+
+    return {
+        post_id: dict(sorted(((k, v) for k, v in histogram.items() if v > 0), key=lambda item: -item[1]))
+        for post_id, histogram in histograms.items()
+    }
+
+def build_post_responses(db: Session, posts: List[Post]) -> List[PostResponse]:
+    """Build PostResponse objects for a page of posts"""
+    authors = load_authors(db, (post.author_id for post in posts))
+    reaction_counts = load_reaction_counts(db, (post.id for post in posts))
+    pending = post_counters.pending_for(post.id for post in posts)
+    return [
+        PostResponse(
+            id=post.id,
+            author=author_payload(authors, post.author_id),
+            content=post.content,
+            post_type=post.post_type,
+            media_type=post.media_type,
+            media_url=post.media_url,
+            created_at=post.created_at,
+            reactions_count=_counter(post, pending, "reactions_count"),
+            comments_count=_counter(post, pending, "comments_count"),
+            shares_count=_counter(post, pending, "shares_count"),
+            reaction_counts=reaction_counts.get(post.id, {}),
+            is_profile_update=post.is_profile_update,
+            is_cover_update=post.is_cover_update
+        )
+        for post in posts
+    ]
+
+def build_post_response(db: Session, post: Post) -> PostResponse:
+    """Build a single PostResponse"""
+    return build_post_responses(db, [post])[0]
+
+def load_viewer_states(db: Session, viewer: ViewerContext, post_ids: List[int]) -> List[PostViewerState]:
+    """Viewer reaction, share flag and counters for the posts of a page the viewer may see"""
+    ids = set(post_ids)
+    if not ids:
+        return []
+
+    posts = db.query(
+        Post.id, Post.author_id, Post.privacy, Post.reactions_count, Post.comments_count, Post.shares_count
+    ).filter(
+        Post.id.in_(ids),
+        Post.deleted_at.is_(None)
+    ).all()
+    # Posts invisíveis para o visitante somem da resposta, como no feed
+    posts = viewer.filter_posts(db, posts)
+    ids = {post.id for post in posts}
+    if not ids:
+        return []
+
+    user_id = viewer.viewer_id
+    reactions = dict(db.query(Reaction.post_id, Reaction.reaction_type).filter(
+        Reaction.user_id == user_id,
+        Reaction.post_id.in_(ids)
+    ).all())
+    shared = {row[0] for row in db.query(Share.post_id).filter(
+        Share.user_id == user_id,
+        Share.post_id.in_(ids)
+    ).distinct().all()}
+    pending = post_counters.pending_for(ids)
+
+    return [
+        PostViewerState(
+            post_id=post.id,
+            reaction_type=reactions.get(post.id),
+            shared=post.id in shared,
+            reactions_count=_counter(post, pending, "reactions_count"),
+            comments_count=_counter(post, pending, "comments_count"),
+            shares_count=_counter(post, pending, "shares_count")
+        )
+        for post in posts
+    ]
+
+def build_comment_responses(db: Session, comments: List[Comment]) -> List[CommentResponse]:
+    """Build CommentResponse objects for a list of comments"""
+    authors = load_authors(db, (comment.author_id for comment in comments))
+    return [
+        CommentResponse(
+            id=comment.id,
+            content=comment.content,
+            author=author_payload(authors, comment.author_id),
+            created_at=comment.created_at,
+            reactions_count=0,
+            parent_id=comment.parent_id
+        )
+        for comment in comments
+    ]
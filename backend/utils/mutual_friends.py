@@ -0,0 +1,98 @@
+"""
+Amigos em comum e amigos de amigos sobre o grafo de amizades em memória
+"""
+import bisect
+from typing import Dict, Iterable, List, Sequence, Set
+from sqlalchemy.orm import Session
+
+from models import Friendship
+from utils.friend_graph import friend_graph
+from utils.timeline import friend_ids
+
+# Acima desta razão entre os graus, buscar cada amigo do menor no maior (bisect)
+# sai mais barato que percorrer as duas listas
+GALLOP_RATIO = 16
+
+def _intersection_size(smaller: Sequence[int], larger: Sequence[int]) -> int:
+    """Size of the intersection of two sorted id lists"""
+    if len(smaller) > len(larger):
+        smaller, larger = larger, smaller
+    if not smaller:
+        return 0
+    if len(smaller) * GALLOP_RATIO < len(larger):
+        count, low = 0, 0
+        for user_id in smaller:
+            low = bisect.bisect_left(larger, user_id, low)
+            if low == len(larger):
+                break
+            if larger[low] == user_id:
+                count += 1
+        return count
+    return len(set(smaller).intersection(larger))
+
+def _sql_mutual_counts(db: Session, friends: Set[int], user_ids: List[int]) -> Dict[int, int]:
+    """Fallback before the graph is loaded: two grouped queries over friendships"""
+    counts: Dict[int, int] = {}
+    if not friends or not user_ids:
+        return counts
+    as_requester = db.query(Friendship.requester_id).filter(
+        Friendship.status == "accepted",
+        Friendship.requester_id.in_(user_ids),
+        Friendship.addressee_id.in_(friends)
+    )
+    as_addressee = db.query(Friendship.addressee_id).filter(
+        Friendship.status == "accepted",
+        Friendship.addressee_id.in_(user_ids),
+        Friendship.requester_id.in_(friends)
+    )
+    for query in (as_requester, as_addressee):
+        for (user_id,) in query.all():
+            counts[user_id] = counts.get(user_id, 0) + 1
+    return counts
+
+def mutual_count(db: Session, user_id: int, other_id: int) -> int:
+    if user_id == other_id:
+        return 0
+    if friend_graph.ready:
+        return _intersection_size(friend_graph.friends_of(user_id), friend_graph.friends_of(other_id))
+    return _sql_mutual_counts(db, friend_ids(db, user_id), [other_id]).get(other_id, 0)
+
+def mutual_counts(db: Session, viewer_id: int, user_ids: Iterable[int]) -> Dict[int, int]:
+    """Mutual-friend counts between the viewer and a whole page of users.
+
+    The viewer's friend set is built once and intersected (in C) with each
+    user's sorted friend list.
+    """
+    user_ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id != viewer_id]
+    if not friend_graph.ready:
+        counts = _sql_mutual_counts(db, friend_ids(db, viewer_id), user_ids)
+        return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+    viewer_friends = set(friend_graph.friends_of(viewer_id))
+    if not viewer_friends:
+        return dict.fromkeys(user_ids, 0)
+    return {
+        user_id: len(viewer_friends.intersection(friend_graph.friends_of(user_id)))
+        for user_id in user_ids
+    }
+
+def is_friend_of_friend(db: Session, user_id: int, other_id: int) -> bool:
+    """True when the two users share at least one friend"""
+    if friend_graph.ready:
+        mine, theirs = friend_graph.friends_of(user_id), friend_graph.friends_of(other_id)
+        if len(mine) > len(theirs):
+            mine, theirs = theirs, mine
+        # Para no primeiro amigo em comum
+        return not set(mine).isdisjoint(theirs)
+    return mutual_count(db, user_id, other_id) > 0
+
+def can_send_friend_request(db: Session, sender_id: int, target) -> bool:
+    """Apply the target's `friend_request_privacy` (everyone, friends_of_friends, none)"""
+    if sender_id == target.id:
+        return False
+    privacy = target.friend_request_privacy or "everyone"
+    if privacy == "none":
+        return False
+    if privacy == "friends_of_friends":
+        return is_friend_of_friend(db, sender_id, target.id)
+    return True
@@ -0,0 +1,58 @@
+"""
+Utilitários de paginação por cursor (keyset)
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor"""
+    raw = json.dumps({"t": created_at.isoformat(), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decode an opaque cursor back into (created_at, id)"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), int(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode a position inside a cached, already ranked result list"""
+    raw = json.dumps({"o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["o"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+def keyset_before(created_column, id_column, position: Tuple[datetime, int]):
+    """Filter rows strictly after `position` in (created_at DESC, id DESC) order"""
+    created_at, row_id = position
+    return or_(
+        created_column < created_at,
+        and_(created_column == created_at, id_column < row_id)
+    )
+
+def keyset_after(created_column, id_column, position: Tuple[datetime, int]):
+    """Filter rows strictly after `position` in (created_at ASC, id ASC) order"""
+    created_at, row_id = position
+    return or_(
+        created_column > created_at,
+        and_(created_column == created_at, id_column > row_id)
+    )
@@ -0,0 +1,114 @@
+"""
+Remoção em segundo plano, em lotes, dos dependentes de posts excluídos
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from core.config import POST_DELETE_BATCH_SIZE, POST_DELETE_MAX_ATTEMPTS, POST_DELETE_STALE_MINUTES
+from core.database import SessionLocal
+from models import Post, PostDeletionJob, Reaction, PostReactionCount, Comment, Share, TimelineEntry
+
+def _delete_batch(db: Session, model, post_id: int) -> int:
+    ids = [row[0] for row in db.query(model.id).filter(model.post_id == post_id).limit(POST_DELETE_BATCH_SIZE).all()]
+    if not ids:
+        return 0
+    return db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+
+def _delete_comment_batch(db: Session, post_id: int) -> int:
+    # Respostas têm id maior que o pai: apagando do maior para o menor, os filhos
+    # saem antes. Dentro do lote o vínculo é desfeito antes do DELETE por causa da FK.
+    ids = [
+        row[0] for row in db.query(Comment.id).filter(Comment.post_id == post_id)
+        .order_by(Comment.id.desc()).limit(POST_DELETE_BATCH_SIZE).all()
+    ]
+    if not ids:
+        return 0
+    db.query(Comment).filter(Comment.id.in_(ids)).update({"parent_id": None}, synchronize_session=False)
+    return db.query(Comment).filter(Comment.id.in_(ids)).delete(synchronize_session=False)
+
+_BATCH_STEPS = (
+    lambda db, post_id: _delete_batch(db, Reaction, post_id),
+    lambda db, post_id: _delete_batch(db, Share, post_id),
+    lambda db, post_id: _delete_batch(db, TimelineEntry, post_id),
+    _delete_comment_batch,
+)
+
+def _claim(db: Session, job_id: int) -> bool:
+    """Atomically move a job to running, so two workers never process it at once"""
+    stale_before = datetime.utcnow() - timedelta(minutes=POST_DELETE_STALE_MINUTES)
+    claimed = db.query(PostDeletionJob).filter(
+        PostDeletionJob.id == job_id,
+        PostDeletionJob.attempts < POST_DELETE_MAX_ATTEMPTS,
+        or_(
+            PostDeletionJob.status.in_(("pending", "failed")),
+            (PostDeletionJob.status == "running") & (PostDeletionJob.updated_at < stale_before)
+        )
+    ).update({
+        "status": "running",
+        "attempts": PostDeletionJob.attempts + 1,
+        "updated_at": datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+def process_post_deletion(job_id: int):
+    """Delete a hidden post's dependents in bounded batches, then the post itself.
+
+    Every batch is its own short transaction and bumps the job's progress.
+    On error the job is marked failed and picked up again by
+    `resume_post_deletions`.
+    """
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.query(PostDeletionJob).filter(PostDeletionJob.id == job_id).first()
+
+        for step in _BATCH_STEPS:
+            while True:
+                deleted = step(db, job.post_id)
+                if not deleted:
+                    break
+                job.rows_deleted += deleted
+                job.updated_at = datetime.utcnow()
+                db.commit()
+
+        db.query(PostReactionCount).filter(PostReactionCount.post_id == job.post_id).delete(synchronize_session=False)
+        db.query(Post).filter(Post.id == job.post_id).delete(synchronize_session=False)
+        job.status = "done"
+        job.last_error = None
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        print(f"🗑️ Post {job.post_id} removido ({job.rows_deleted} dependentes)")
+    except Exception as e:
+        print(f"❌ Erro ao remover post do job {job_id}: {e}")
+        db.rollback()
+        db.query(PostDeletionJob).filter(PostDeletionJob.id == job_id).update({
+            "status": "failed",
+            "last_error": str(e)[:1000],
+            "updated_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def resume_post_deletions():
+    """Retry failed jobs and pick up jobs left behind by a crashed worker"""
+    stale_before = datetime.utcnow() - timedelta(minutes=POST_DELETE_STALE_MINUTES)
+    db = SessionLocal()
+    try:
+        job_ids = [
+            row[0] for row in db.query(PostDeletionJob.id).filter(
+                PostDeletionJob.attempts < POST_DELETE_MAX_ATTEMPTS,
+                or_(
+                    PostDeletionJob.status.in_(("pending", "failed")),
+                    (PostDeletionJob.status == "running") & (PostDeletionJob.updated_at < stale_before)
+                )
+            ).order_by(PostDeletionJob.id).limit(100).all()
+        ]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        process_post_deletion(job_id)
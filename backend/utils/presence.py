@@ -0,0 +1,102 @@
+"""
+Presença (online/offline) em memória e last_seen gravado em lote
+
+Conexões de websocket e heartbeats só atualizam dicionários; o last_seen vai
+para o banco num único UPDATE em lote (executemany) a cada flush.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import bindparam, update
+
+from core.config import PRESENCE_ONLINE_SECONDS
+from core.database import SessionLocal
+from models import User
+
+class PresenceTracker:
+    """Open connections and last activity per user, in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections: Dict[int, int] = {}
+        self._last_seen: Dict[int, datetime] = {}
+        # last_seen ainda não gravado no banco
+        self._dirty: Dict[int, datetime] = {}
+
+    def touch(self, user_id: int):
+        """Record activity (heartbeat, connect, disconnect)"""
+        now = datetime.utcnow()
+        with self._lock:
+            self._last_seen[user_id] = now
+            self._dirty[user_id] = now
+
+    def connected(self, user_id: int):
+        with self._lock:
+            self._connections[user_id] = self._connections.get(user_id, 0) + 1
+        self.touch(user_id)
+
+    def disconnected(self, user_id: int):
+        with self._lock:
+            remaining = self._connections.get(user_id, 0) - 1
+            if remaining > 0:
+                self._connections[user_id] = remaining
+            else:
+                self._connections.pop(user_id, None)
+        self.touch(user_id)
+
+    def statuses(self, user_ids: Iterable[int]) -> Dict[int, Tuple[bool, Optional[datetime]]]:
+        """(is_online, last_seen known in memory) for each user"""
+        cutoff = datetime.utcnow() - timedelta(seconds=PRESENCE_ONLINE_SECONDS)
+        with self._lock:
+            result = {}
+            for user_id in user_ids:
+                last_seen = self._last_seen.get(user_id)
+                online = user_id in self._connections or (last_seen is not None and last_seen >= cutoff)
+                result[user_id] = (online, last_seen)
+            return result
+
+    def is_online(self, user_id: int) -> bool:
+        return self.statuses([user_id])[user_id][0]
+
+    def drain(self) -> Dict[int, datetime]:
+        cutoff = datetime.utcnow() - timedelta(seconds=PRESENCE_ONLINE_SECONDS)
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            # Quem já saiu da janela de online e não tem conexão é lido do banco dali em diante
+            stale = [
+                user_id for user_id, seen in self._last_seen.items()
+                if seen < cutoff and user_id not in self._connections and user_id not in dirty
+            ]
+            for user_id in stale:
+                del self._last_seen[user_id]
+            return dirty
+
+    def restore(self, dirty: Dict[int, datetime]):
+        """Put back timestamps from a failed flush, keeping newer activity"""
+        with self._lock:
+            for user_id, seen in dirty.items():
+                if seen > self._dirty.get(user_id, seen - timedelta(seconds=1)):
+                    self._dirty[user_id] = seen
+
+# Instância global do rastreador de presença
+presence = PresenceTracker()
+
+_users = User.__table__
+_last_seen_statement = update(_users).where(_users.c.id == bindparam("b_id")).values(last_seen=bindparam("b_last_seen"))
+
+def flush_presence():
+    """Write pending last_seen values with one batched UPDATE (executemany)"""
+    dirty = presence.drain()
+    if not dirty:
+        return
+
+    db = SessionLocal()
+    try:
+        db.execute(_last_seen_statement, [{"b_id": user_id, "b_last_seen": seen} for user_id, seen in dirty.items()])
+        db.commit()
+    except Exception as e:
+        print(f"❌ Erro ao gravar last_seen: {e}")
+        db.rollback()
+        presence.restore(dirty)
+    finally:
+        db.close()
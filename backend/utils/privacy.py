@@ -0,0 +1,104 @@
+"""
+Motor de privacidade: contexto do visitante montado uma vez por requisição
+
+Cada configuração de visibilidade (public, friends, private) é compilada para o
+nível mínimo de relação exigido, e o visitante tem um nível por dono (bloqueado,
+desconhecido, amigo, ele mesmo). Uma página inteira de posts ou de campos é
+filtrada comparando inteiros, sem consulta por item.
+"""
+from typing import AbstractSet, Iterable, List, Optional, Set
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from core.database import get_db
+from core.security import get_current_user
+from models import User, Post
+from utils.blocks import blocked_ids
+from utils.timeline import friend_ids
+
+# Níveis de relação do visitante com o dono do conteúdo
+BLOCKED, STRANGER, FRIEND, OWNER = -1, 0, 1, 2
+
+# Nível mínimo exigido por configuração; valores desconhecidos valem como private
+REQUIRED_LEVEL = {"public": STRANGER, "friends": FRIEND, "private": OWNER}
+
+# Configurações de visibilidade do perfil e o padrão do modelo para colunas vazias
+PROFILE_SETTINGS = {
+    "profile_visibility": "public",
+    "email_visibility": "private",
+    "phone_visibility": "private",
+    "birth_date_visibility": "friends"
+}
+
+# Campos do perfil ocultos quando profile_visibility não permite a visualização
+RESTRICTED_PROFILE_FIELDS = (
+    "nickname", "bio", "cover_photo", "location", "website",
+    "relationship_status", "work", "education"
+)
+
+def required_level(visibility: Optional[str], default: str = "public") -> int:
+    return REQUIRED_LEVEL.get(visibility or default, OWNER)
+
+class ViewerContext:
+    """Friend and block sets of the viewer, loaded once per request"""
+
+    def __init__(self, viewer_id: int, friends: Set[int], blocked: AbstractSet[int]):
+        self.viewer_id = viewer_id
+        self.friends = friends
+        self.blocked = blocked
+
+    def level(self, owner_id: int) -> int:
+        if owner_id == self.viewer_id:
+            return OWNER
+        if owner_id in self.blocked:
+            return BLOCKED
+        return FRIEND if owner_id in self.friends else STRANGER
+
+    def is_blocked(self, user_id: int) -> bool:
+        return user_id != self.viewer_id and user_id in self.blocked
+
+    def can_see(self, owner_id: int, visibility: Optional[str], default: str = "public") -> bool:
+        return self.level(owner_id) >= required_level(visibility, default)
+
+    def visible_settings(self, user: User) -> Set[str]:
+        """Names of the PROFILE_SETTINGS of `user` that allow this viewer"""
+        level = self.level(user.id)
+        return {
+            setting for setting, default in PROFILE_SETTINGS.items()
+            if level >= required_level(getattr(user, setting), default)
+        }
+
+    def filter_posts(self, db: Session, posts: List[Post]) -> List[Post]:
+        """Keep the posts this viewer may see, in order.
+
+        A post needs both its own `privacy` and the author's `post_visibility`
+        (the stricter one wins); the authors' settings come from one IN query.
+        """
+        if not posts:
+            return posts
+        author_levels = {author_id: self.level(author_id) for author_id in {post.author_id for post in posts}}
+        pending = [author_id for author_id, level in author_levels.items() if STRANGER <= level < OWNER]
+        ceilings = dict(
+            db.query(User.id, User.post_visibility).filter(User.id.in_(pending)).all()
+        ) if pending else {}
+        thresholds = {author_id: required_level(visibility) for author_id, visibility in ceilings.items()}
+
+        return [
+            post for post in posts
+            if author_levels[post.author_id] >= max(required_level(post.privacy), thresholds.get(post.author_id, STRANGER))
+        ]
+
+    def can_see_post(self, db: Session, post: Post) -> bool:
+        return bool(self.filter_posts(db, [post]))
+
+    def filter_user_ids(self, user_ids: Iterable[int]) -> List[int]:
+        """Drop users on either side of a block with the viewer"""
+        return [user_id for user_id in user_ids if not self.is_blocked(user_id)]
+
+def build_viewer_context(db: Session, viewer_id: int) -> ViewerContext:
+    return ViewerContext(viewer_id, friend_ids(db, viewer_id), blocked_ids(db, viewer_id))
+
+def get_viewer_context(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> ViewerContext:
+    """Dependency: the current user's privacy context"""
+    return build_viewer_context(db, current_user.id)
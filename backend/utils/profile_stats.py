@@ -0,0 +1,131 @@
+"""
+Contadores do perfil (amigos, posts, seguidores, seguindo) mantidos em user_stats
+"""
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import func, update
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from core.config import USER_STATS_RECONCILE_BATCH_SIZE, USER_STATS_RECONCILE_BATCHES_PER_RUN
+from core.database import SessionLocal
+from models import Post, Friendship, Follow, UserStats
+from utils.friend_graph import friend_graph
+
+STAT_FIELDS = ("friends_count", "posts_count", "followers_count", "following_count")
+
+def are_friends(db: Session, user_id: int, other_id: int) -> bool:
+    """Accepted friendship in either direction: in-memory graph, or point lookups on ix_friendships_pair"""
+    if user_id == other_id:
+        return False
+    if friend_graph.ready:
+        return friend_graph.are_friends(user_id, other_id)
+    return db.query(Friendship.id).filter(
+        Friendship.requester_id.in_((user_id, other_id)),
+        Friendship.addressee_id.in_((user_id, other_id)),
+        Friendship.status == "accepted"
+    ).first() is not None
+
+def _grouped(query) -> Dict[int, int]:
+    return dict(query.all())
+
+def _compute_stats(db: Session, user_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """Count each stat from the source tables with one grouped query per direction"""
+    as_requester = _grouped(db.query(Friendship.requester_id, func.count(Friendship.id)).filter(
+        Friendship.requester_id.in_(user_ids),
+        Friendship.status == "accepted"
+    ).group_by(Friendship.requester_id))
+    as_addressee = _grouped(db.query(Friendship.addressee_id, func.count(Friendship.id)).filter(
+        Friendship.addressee_id.in_(user_ids),
+        Friendship.status == "accepted"
+    ).group_by(Friendship.addressee_id))
+    posts = _grouped(db.query(Post.author_id, func.count(Post.id)).filter(
+        Post.author_id.in_(user_ids),
+        Post.deleted_at.is_(None)
+    ).group_by(Post.author_id))
+    followers = _grouped(db.query(Follow.followed_id, func.count(Follow.id)).filter(
+        Follow.followed_id.in_(user_ids)
+    ).group_by(Follow.followed_id))
+    following = _grouped(db.query(Follow.follower_id, func.count(Follow.id)).filter(
+        Follow.follower_id.in_(user_ids)
+    ).group_by(Follow.follower_id))
+
+    return {
+        user_id: {
+            "friends_count": as_requester.get(user_id, 0) + as_addressee.get(user_id, 0),
+            "posts_count": posts.get(user_id, 0),
+            "followers_count": followers.get(user_id, 0),
+            "following_count": following.get(user_id, 0)
+        }
+        for user_id in user_ids
+    }
+
+def get_user_stats(db: Session, user_id: int) -> Dict[str, int]:
+    """Profile counters by primary key; the row is created from COUNTs on first use"""
+    row = db.query(*(getattr(UserStats, field) for field in STAT_FIELDS)).filter(UserStats.user_id == user_id).first()
+    if row:
+        return dict(zip(STAT_FIELDS, row))
+
+    stats = _compute_stats(db, [user_id])[user_id]
+    statement = insert(UserStats).values(user_id=user_id, updated_at=datetime.utcnow(), **stats)
+    # Duas primeiras leituras concorrentes: a segunda só sobrescreve com os mesmos valores
+    db.execute(statement.on_duplicate_key_update(**{field: statement.inserted[field] for field in STAT_FIELDS}))
+    db.commit()
+    return stats
+
+def bump_user_stats(db: Session, user_id: int, **deltas: int):
+    """Apply counter deltas in the caller's transaction.
+
+    Users without a row yet are skipped: their counters are computed from
+    the source tables the first time the profile is read.
+    """
+    values = {field: getattr(UserStats, field) + delta for field, delta in deltas.items() if delta}
+    if not values:
+        return
+    values["updated_at"] = datetime.utcnow()
+    db.execute(update(UserStats).where(UserStats.user_id == user_id).values(**values))
+
+def record_friendship_change(db: Session, user_id: int, other_id: int, delta: int):
+    """Call when a friendship is accepted (+1) or undone (-1)"""
+    bump_user_stats(db, user_id, friends_count=delta)
+    bump_user_stats(db, other_id, friends_count=delta)
+
+def record_follow_change(db: Session, follower_id: int, followed_id: int, delta: int):
+    """Call when a follow is created (+1) or removed (-1)"""
+    bump_user_stats(db, followed_id, followers_count=delta)
+    bump_user_stats(db, follower_id, following_count=delta)
+
+_reconcile_state = {"last_id": 0}
+
+def reconcile_user_stats():
+    """Fix drift in user_stats from the source tables, a few batches per run, wrapping around"""
+    db = SessionLocal()
+    try:
+        fixed = 0
+        for _ in range(USER_STATS_RECONCILE_BATCHES_PER_RUN):
+            rows = db.query(UserStats).filter(
+                UserStats.user_id > _reconcile_state["last_id"]
+            ).order_by(UserStats.user_id).limit(USER_STATS_RECONCILE_BATCH_SIZE).all()
+
+            if not rows:
+                _reconcile_state["last_id"] = 0
+                break
+            _reconcile_state["last_id"] = rows[-1].user_id
+
+            expected = _compute_stats(db, [row.user_id for row in rows])
+            for row in rows:
+                current = {field: getattr(row, field) for field in STAT_FIELDS}
+                if current != expected[row.user_id]:
+                    for field, value in expected[row.user_id].items():
+                        setattr(row, field, value)
+                    row.updated_at = datetime.utcnow()
+                    fixed += 1
+            db.commit()
+
+        if fixed:
+            print(f"🔧 {fixed} contadores de perfil corrigidos")
+    except Exception as e:
+        print(f"❌ Erro na reconciliação dos contadores de perfil: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,72 @@
+"""
+Upsert atômico de reações (um único INSERT ... ON DUPLICATE KEY UPDATE)
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Reaction
+
+# INSERT ... SELECT só insere se o post existir e não estiver oculto. A tabela
+# derivada "new" faz o papel do alias de linha (INSERT ... AS new não aceita SELECT),
+# então o UPDATE não usa VALUES(). O tipo anterior sai na variável de sessão
+# @previous_reaction: zerada ao gerar a linha nova e preenchida pelo UPDATE com o
+# valor travado pelo próprio INSERT. updated_at vem antes de reaction_type porque
+# o MySQL aplica as atribuições em ordem; repetir o mesmo tipo não altera a linha
+_UPSERT_REACTION = text("""
+    INSERT INTO reactions (user_id, post_id, reaction_type, created_at, updated_at)
+    SELECT * FROM (
+        SELECT :user_id AS user_id, posts.id AS post_id,
+               IF((@previous_reaction := NULL) IS NULL, :reaction_type, :reaction_type) AS reaction_type,
+               :now AS created_at, :now AS updated_at
+        FROM posts
+        WHERE posts.id = :post_id AND posts.deleted_at IS NULL
+    ) AS new
+    ON DUPLICATE KEY UPDATE
+        updated_at = IF(reactions.reaction_type = new.reaction_type, reactions.updated_at, new.updated_at),
+        reaction_type = IF((@previous_reaction := reactions.reaction_type) IS NULL, new.reaction_type, new.reaction_type)
+""")
+
+_PREVIOUS_REACTION = text("SELECT @previous_reaction")
+
+def upsert_reaction(db: Session, post_id: int, user_id: int, reaction_type: str) -> Tuple[str, Optional[str]]:
+    """Add or change a user's reaction to a post, race-free under the unique index.
+
+    Returns (outcome, previous_type) where outcome is one of "added",
+    "updated", "unchanged" or "missing" (post not found). The write is one
+    statement; the previous type is read back from a session variable on the
+    same connection, so concurrent toggles each see the value they replaced.
+    """
+    result = db.execute(_UPSERT_REACTION, {
+        "post_id": post_id,
+        "user_id": user_id,
+        "reaction_type": reaction_type,
+        "now": datetime.utcnow()
+    })
+    # Com CLIENT_FOUND_ROWS: 0 = post ausente, 1 = inserida ou mesmo tipo, 2 = tipo trocado
+    if result.rowcount == 0:
+        return "missing", None
+
+    previous_type = db.execute(_PREVIOUS_REACTION).scalar()
+    if previous_type is None:
+        return "added", None
+    if previous_type == reaction_type:
+        return "unchanged", previous_type
+    return "updated", previous_type
+
+def delete_reaction(db: Session, post_id: int, user_id: int) -> Optional[str]:
+    """Remove a user's reaction; returns its type only if this call deleted it"""
+    reaction_type = db.query(Reaction.reaction_type).filter(
+        Reaction.post_id == post_id,
+        Reaction.user_id == user_id
+    ).scalar()
+    if reaction_type is None:
+        return None
+
+    # Só quem de fato apagou a linha ajusta os contadores (toques duplos concorrentes)
+    deleted = db.query(Reaction).filter(
+        Reaction.post_id == post_id,
+        Reaction.user_id == user_id
+    ).delete(synchronize_session=False)
+    return reaction_type if deleted else None
@@ -0,0 +1,131 @@
+"""
+Refresh tokens opacos com rotação (renovação da sessão sem bcrypt)
+
+O banco guarda só o HMAC do token. Cada uso revoga o token atual e emite o
+próximo na mesma família (um dispositivo); reapresentar um token já rotacionado
+indica vazamento e revoga a família inteira.
+"""
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from core.config import SECRET_KEY, REFRESH_TOKEN_EXPIRE_DAYS, REFRESH_TOKEN_SWEEP_BATCH_SIZE
+from core.database import SessionLocal
+from models import User, RefreshToken
+
+def _digest(token: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+def issue_refresh_token(db: Session, user_id: int, device: Optional[str] = None, family_id: Optional[str] = None) -> str:
+    """Create a token (a new family unless rotating) in the caller's transaction; returns the opaque value"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=_digest(token),
+        family_id=family_id or secrets.token_hex(16),
+        device=(device or "")[:200] or None,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+def revoke_family(db: Session, family_id: str, user_id: Optional[int] = None) -> int:
+    """Revoke every live token of a device session"""
+    statement = update(RefreshToken).where(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None)
+    )
+    if user_id is not None:
+        statement = statement.where(RefreshToken.user_id == user_id)
+    return db.execute(statement.values(revoked_at=datetime.utcnow())).rowcount
+
+def revoke_refresh_token(db: Session, token: str) -> bool:
+    """Logout: revoke the device session the token belongs to"""
+    family_id = db.query(RefreshToken.family_id).filter(RefreshToken.token_hash == _digest(token)).scalar()
+    return bool(family_id) and revoke_family(db, family_id) > 0
+
+def revoke_user_sessions(db: Session, user_id: int) -> int:
+    """Revoke every session of a user (password change, deactivation)"""
+    return db.execute(
+        update(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).values(revoked_at=datetime.utcnow())
+    ).rowcount
+
+def rotate_refresh_token(db: Session, token: str) -> Optional[Tuple[int, str, str]]:
+    """Exchange a refresh token for the next one: (user_id, email, new_token), or None when invalid.
+
+    One indexed read (token_hash, joined with the user) and one HMAC; the
+    conditional UPDATE makes two concurrent uses of the same token count as reuse.
+    """
+    row = db.query(
+        RefreshToken.id, RefreshToken.user_id, RefreshToken.family_id, RefreshToken.device,
+        RefreshToken.expires_at, RefreshToken.revoked_at, User.email, User.is_active
+    ).join(User, User.id == RefreshToken.user_id).filter(RefreshToken.token_hash == _digest(token)).first()
+
+    now = datetime.utcnow()
+    if not row or row.expires_at < now or not row.is_active:
+        return None
+    if row.revoked_at is not None:
+        # Token já usado: alguém guardou uma cópia, derruba a sessão do dispositivo
+        revoke_family(db, row.family_id)
+        db.commit()
+        return None
+
+    claimed = db.execute(
+        update(RefreshToken).where(RefreshToken.id == row.id, RefreshToken.revoked_at.is_(None)).values(revoked_at=now)
+    ).rowcount
+    if not claimed:
+        revoke_family(db, row.family_id)
+        db.commit()
+        return None
+
+    new_token = issue_refresh_token(db, row.user_id, row.device, row.family_id)
+    db.commit()
+    return row.user_id, row.email, new_token
+
+def active_sessions(db: Session, user_id: int):
+    """One row per device: first login, last renewal and current expiry"""
+    return db.query(
+        RefreshToken.family_id,
+        func.max(RefreshToken.device).label("device"),
+        func.min(RefreshToken.created_at).label("created_at"),
+        func.max(RefreshToken.created_at).label("last_used_at"),
+        func.max(RefreshToken.expires_at).label("expires_at")
+    ).filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.family_id.in_(
+            db.query(RefreshToken.family_id).filter(
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > datetime.utcnow()
+            )
+        )
+    ).group_by(RefreshToken.family_id).order_by(func.max(RefreshToken.created_at).desc()).all()
+
+def sweep_refresh_tokens():
+    """Delete expired tokens in small batches (revoked ones are kept until expiry to detect reuse)"""
+    db = SessionLocal()
+    try:
+        deleted = 0
+        while True:
+            ids = [
+                row[0] for row in db.query(RefreshToken.id).filter(
+                    RefreshToken.expires_at < datetime.utcnow()
+                ).limit(REFRESH_TOKEN_SWEEP_BATCH_SIZE).all()
+            ]
+            if not ids:
+                break
+            deleted += db.query(RefreshToken).filter(RefreshToken.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        if deleted:
+            print(f"🧹 {deleted} refresh tokens vencidos removidos")
+    except Exception as e:
+        print(f"❌ Erro na limpeza de refresh tokens: {e}")
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,143 @@
+"""
+Timeline materializada por usuário (fan-out na escrita com caminho híbrido para celebridades)
+"""
+import threading
+import time
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from core.config import (
+    TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD,
+    TIMELINE_FANOUT_BATCH_SIZE,
+    TIMELINE_CELEBRITY_CACHE_SECONDS
+)
+from core.database import SessionLocal
+from models import Post, Friendship, Follow, TimelineEntry, UserStats
+from utils.pagination import encode_cursor, decode_cursor, keyset_before
+from utils.friend_graph import friend_graph
+from utils.profile_stats import get_user_stats
+
+_celebrity_lock = threading.Lock()
+_celebrity_cache = {"ids": set(), "loaded_at": 0.0}
+
+def friend_ids(db: Session, user_id: int) -> Set[int]:
+    """Accepted friends of a user, in both directions of the friendship"""
+    if friend_graph.ready:
+        return set(friend_graph.friends_of(user_id))
+    as_requester = db.query(Friendship.addressee_id).filter(
+        Friendship.requester_id == user_id,
+        Friendship.status == "accepted"
+    )
+    as_addressee = db.query(Friendship.requester_id).filter(
+        Friendship.addressee_id == user_id,
+        Friendship.status == "accepted"
+    )
+    return {row[0] for row in as_requester.union(as_addressee).all()}
+
+def follower_ids(db: Session, user_id: int) -> Set[int]:
+    return {row[0] for row in db.query(Follow.follower_id).filter(Follow.followed_id == user_id).all()}
+
+def is_celebrity(db: Session, user_id: int) -> bool:
+    # Lê o contador mantido em user_stats (e cria a linha do autor, se faltar)
+    return get_user_stats(db, user_id)["followers_count"] > TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD
+
+def celebrity_ids(db: Session) -> Set[int]:
+    """Authors above the follower threshold, cached per process"""
+    with _celebrity_lock:
+        if time.monotonic() - _celebrity_cache["loaded_at"] < TIMELINE_CELEBRITY_CACHE_SECONDS:
+            return _celebrity_cache["ids"]
+
+    # Range scan em ix_user_stats_followers_count, em vez de agrupar todos os follows
+    rows = db.query(UserStats.user_id).filter(
+        UserStats.followers_count > TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD
+    ).all()
+    ids = {row[0] for row in rows}
+
+    with _celebrity_lock:
+        _celebrity_cache["ids"] = ids
+        _celebrity_cache["loaded_at"] = time.monotonic()
+    return ids
+
+def fan_out_post(post_id: int):
+    """Insert a new post into the timelines of its audience.
+
+    Runs as a background task after the request has returned, so it opens
+    its own session.
+    """
+    db = SessionLocal()
+    try:
+        post = db.query(Post.id, Post.author_id, Post.created_at, Post.privacy).filter(
+            Post.id == post_id,
+            Post.deleted_at.is_(None)
+        ).first()
+        if not post:
+            return
+
+        audience = {post.author_id}
+        if post.privacy != "private":
+            audience |= friend_ids(db, post.author_id)
+        # Seguidores só recebem posts públicos; celebridades são puxadas na leitura
+        if post.privacy == "public" and not is_celebrity(db, post.author_id):
+            audience |= follower_ids(db, post.author_id)
+
+        rows = [
+            {"user_id": user_id, "post_id": post.id, "author_id": post.author_id, "created_at": post.created_at}
+            for user_id in audience
+        ]
+        for start in range(0, len(rows), TIMELINE_FANOUT_BATCH_SIZE):
+            db.execute(insert(TimelineEntry), rows[start:start + TIMELINE_FANOUT_BATCH_SIZE])
+            db.commit()
+    except Exception as e:
+        print(f"❌ Erro no fan-out do post {post_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def read_timeline(db: Session, user_id: int, limit: int, cursor: Optional[str]) -> Tuple[List[Post], Optional[str]]:
+    """Read one page of a user's timeline in (created_at DESC, post_id DESC) order"""
+    position = decode_cursor(cursor)
+
+    # Caminho de push: range scan em timeline_entries
+    query = db.query(TimelineEntry.created_at, TimelineEntry.post_id).filter(TimelineEntry.user_id == user_id)
+    if position:
+        query = query.filter(keyset_before(TimelineEntry.created_at, TimelineEntry.post_id, position))
+    keys = query.order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc()).limit(limit + 1).all()
+
+    # Caminho de pull: posts públicos das celebridades que o usuário segue
+    celebrities = celebrity_ids(db)
+    if celebrities:
+        followed = [
+            row[0] for row in db.query(Follow.followed_id).filter(
+                Follow.follower_id == user_id,
+                Follow.followed_id.in_(celebrities)
+            ).all()
+        ]
+        if followed:
+            pull = db.query(Post.created_at, Post.id).filter(
+                Post.author_id.in_(followed),
+                Post.privacy == "public",
+                Post.deleted_at.is_(None)
+            )
+            if position:
+                pull = pull.filter(keyset_before(Post.created_at, Post.id, position))
+            keys += pull.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+
+    merged = sorted(set((row[0], row[1]) for row in keys), reverse=True)[:limit + 1]
+
+    next_cursor = None
+    if len(merged) > limit:
+        merged = merged[:limit]
+        next_cursor = encode_cursor(*merged[-1])
+
+    if not merged:
+        return [], None
+
+    posts_by_id = {
+        post.id: post
+        for post in db.query(Post).filter(
+            Post.id.in_([post_id for _, post_id in merged]),
+            Post.deleted_at.is_(None)
+        ).all()
+    }
+    return [posts_by_id[post_id] for _, post_id in merged if post_id in posts_by_id], next_cursor
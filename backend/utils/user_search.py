@@ -0,0 +1,360 @@
+"""
+Índice de busca de usuários em memória (prefixo de tokens, sem acentos)
+
+Substitui o ILIKE '%q%' em três colunas, que não usa índice e varre a tabela
+`users` a cada tecla digitada.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from core.cache import TTLCache
+from core.config import USER_SEARCH_MAX_RESULTS, USER_SEARCH_CACHE_SECONDS
+from core.database import SessionLocal
+from models import User, Follow
+from utils.mutual_friends import mutual_counts
+from utils.timeline import friend_ids
+
+# Limites por consulta: prefixos muito curtos ("a") não percorrem o índice inteiro
+MAX_PREFIX_TOKENS = 50000
+MAX_PREFIX_SET_SIZE = 100000
+MAX_PREFIX_CANDIDATES = 200000
+MAX_RANKED_MATCHES = 200
+# Custo relativo de montar o conjunto de um token versus conferir um candidato
+PREFIX_SET_COST = 8
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z@._-]+")
+
+def normalize(value: Optional[str]) -> str:
+    """Lowercase and strip accents, so "José" matches "jose" """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower().strip()
+
+def tokenize(value: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT.split(value) if token]
+
+class _TokenTable:
+    """Sorted token array + postings; a posting is an int while only one user has the token"""
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.postings: Dict[str, Union[int, Set[int]]] = {}
+
+    def add(self, token: str, user_id: int, sort: bool = True):
+        current = self.postings.get(token)
+        if current is None:
+            self.postings[token] = user_id
+            if sort:
+                bisect.insort(self.tokens, token)
+            else:
+                self.tokens.append(token)
+        elif isinstance(current, int):
+            if current != user_id:
+                self.postings[token] = {current, user_id}
+        else:
+            current.add(user_id)
+
+    def remove(self, token: str, user_id: int):
+        current = self.postings.get(token)
+        if current is None:
+            return
+        if isinstance(current, int):
+            if current == user_id:
+                del self.postings[token]
+                position = bisect.bisect_left(self.tokens, token)
+                if position < len(self.tokens) and self.tokens[position] == token:
+                    del self.tokens[position]
+            return
+        current.discard(user_id)
+        if len(current) == 1:
+            self.postings[token] = next(iter(current))
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect.bisect_left(self.tokens, prefix), bisect.bisect_left(self.tokens, prefix + "￿")
+
+    def range_size(self, prefix: str) -> int:
+        start, end = self._range(prefix)
+        return end - start
+
+    def iter_prefix(self, prefix: str) -> Iterator[int]:
+        """Users with a token starting with `prefix`, exact and shorter tokens first.
+
+        The caller holds the index lock, so postings do not change while iterating.
+        """
+        start, end = self._range(prefix)
+        for position in range(start, end):
+            posting = self.postings[self.tokens[position]]
+            if isinstance(posting, int):
+                yield posting
+            else:
+                yield from posting
+
+    def prefix_set(self, prefix: str) -> Optional[Set[int]]:
+        """Union of the postings under `prefix`, or None when it is too broad to build"""
+        start, end = self._range(prefix)
+        if end - start > MAX_PREFIX_TOKENS:
+            return None
+        if end - start == 1:
+            posting = self.postings[self.tokens[start]]
+            return {posting} if isinstance(posting, int) else posting
+        ids: Set[int] = set()
+        for position in range(start, end):
+            posting = self.postings[self.tokens[position]]
+            if isinstance(posting, int):
+                ids.add(posting)
+            else:
+                ids.update(posting)
+                if len(ids) > MAX_PREFIX_SET_SIZE:
+                    return None
+        return ids
+
+class UserSearchIndex:
+    """Prefix index over name tokens, plus username and e-mail for single-token lookups"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._name_tokens = _TokenTable()
+        self._account_tokens = _TokenTable()  # username e e-mail completos (quase sempre únicos)
+        self._names: Dict[int, str] = {}  # nome completo normalizado, para o ranking
+        self._documents: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        self.ready = False
+        self.watermark: Optional[datetime] = None
+        self.max_user_id = 0
+
+    @staticmethod
+    def _document(first_name, last_name, email, username):
+        name = " ".join(tokenize(normalize(f"{first_name or ''} {last_name or ''}")))
+        name_tokens = tuple(dict.fromkeys(name.split()))
+        account_tokens = tuple(dict.fromkeys(token for token in (normalize(username), normalize(email)) if token))
+        return name, name_tokens, account_tokens
+
+    def _add(self, user_id: int, first_name, last_name, email, username, sort: bool = True):
+        name, name_tokens, account_tokens = self._document(first_name, last_name, email, username)
+        for token in name_tokens:
+            self._name_tokens.add(token, user_id, sort)
+        for token in account_tokens:
+            self._account_tokens.add(token, user_id, sort)
+        self._documents[user_id] = (name_tokens, account_tokens)
+        self._names[user_id] = name
+        self.max_user_id = max(self.max_user_id, user_id)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            name_tokens, account_tokens = self._documents.pop(user_id, ((), ()))
+            for token in name_tokens:
+                self._name_tokens.remove(token, user_id)
+            for token in account_tokens:
+                self._account_tokens.remove(token, user_id)
+            self._names.pop(user_id, None)
+
+    def upsert(self, user_id: int, first_name, last_name, email, username):
+        """Add or re-index one user (registration, profile change)"""
+        with self._lock:
+            self.remove(user_id)
+            self._add(user_id, first_name, last_name, email, username)
+
+    def build(self, rows: Iterable, watermark: Optional[datetime] = None):
+        """Full rebuild from (id, first_name, last_name, email, username) rows"""
+        fresh = UserSearchIndex()
+        for row in rows:
+            fresh._add(row[0], row[1], row[2], row[3], row[4], sort=False)
+        fresh._name_tokens.tokens.sort()
+        fresh._account_tokens.tokens.sort()
+
+        with self._lock:
+            self._name_tokens = fresh._name_tokens
+            self._account_tokens = fresh._account_tokens
+            self._names = fresh._names
+            self._documents = fresh._documents
+            self.max_user_id = fresh.max_user_id
+            self.watermark = watermark
+            self.ready = True
+
+    def _matches_name(self, user_id: int, tokens: List[str]) -> bool:
+        # " token" contido em " nome completo" equivale a algum token do nome começar com o prefixo
+        name = " " + self._names.get(user_id, "")
+        return all(" " + token in name for token in tokens)
+
+    def _single_token_matches(self, token: str, excluded: Set[int]) -> List[int]:
+        # Nomes primeiro: com o limite de candidatos, os melhores do ranking entram antes
+        matches = []
+        seen = set(excluded)
+        for table in (self._name_tokens, self._account_tokens):
+            for user_id in islice(table.iter_prefix(token), MAX_PREFIX_CANDIDATES):
+                if user_id not in seen:
+                    seen.add(user_id)
+                    matches.append(user_id)
+                    if len(matches) >= MAX_RANKED_MATCHES:
+                        return matches
+        return matches
+
+    def _multi_token_matches(self, tokens: List[str], excluded: Set[int]) -> List[int]:
+        # Tokens mais longos (mais seletivos) primeiro. Um prefixo vira conjunto e entra
+        # na interseção (em C) só se tiver poucos tokens perto do número de candidatos;
+        # senão é mais barato conferir os candidatos um a um (com parada antecipada).
+        candidates: Optional[Set[int]] = None
+        unchecked = []
+        for token in sorted(tokens, key=len, reverse=True):
+            if candidates is not None and self._name_tokens.range_size(token) * PREFIX_SET_COST > len(candidates):
+                unchecked.append(token)
+                continue
+            ids = self._name_tokens.prefix_set(token)
+            if ids is None:
+                unchecked.append(token)
+            else:
+                candidates = ids if candidates is None else candidates & ids
+
+        if candidates is None:
+            driver = unchecked.pop(0)
+            candidates = islice(self._name_tokens.iter_prefix(driver), MAX_PREFIX_CANDIDATES)
+
+        matches = []
+        for user_id in candidates:
+            if user_id not in excluded and (not unchecked or self._matches_name(user_id, unchecked)):
+                matches.append(user_id)
+                if len(matches) >= MAX_RANKED_MATCHES:
+                    break
+        return matches
+
+    def rank_key(self, user_id: int, normalized_query: str, query_tokens: List[str]):
+        """Sort key: exact full name, then full-name prefix, then name-token match, then the rest"""
+        name = self._names.get(user_id, "")
+        if name == normalized_query:
+            tier = 0
+        elif name.startswith(normalized_query):
+            tier = 1
+        elif self._matches_name(user_id, query_tokens):
+            tier = 2
+        else:
+            tier = 3  # casou só por e-mail ou username
+        return (tier, len(name), user_id)
+
+    def search(self, query: str, limit: int = 20, exclude: Iterable[int] = ()) -> List[int]:
+        """Ids of users matching every query token by prefix, best ranked first"""
+        normalized_query = " ".join(tokenize(normalize(query)))
+        query_tokens = list(dict.fromkeys(normalized_query.split()))
+        if not query_tokens:
+            return []
+        excluded = set(exclude)
+
+        with self._lock:
+            if len(query_tokens) == 1:
+                matches = self._single_token_matches(query_tokens[0], excluded)
+            else:
+                matches = self._multi_token_matches(query_tokens, excluded)
+            return heapq.nsmallest(
+                limit,
+                matches,
+                key=lambda user_id: self.rank_key(user_id, normalized_query, query_tokens)
+            )
+
+    def token_count(self) -> int:
+        return len(self._name_tokens.tokens) + len(self._account_tokens.tokens)
+
+    def __len__(self):
+        return len(self._names)
+
+# Instância global do índice
+user_search_index = UserSearchIndex()
+
+# Resultado ranqueado por (usuário, consulta): as páginas seguintes não refazem o ranking
+_ranked_cache = TTLCache(ttl_seconds=USER_SEARCH_CACHE_SECONDS)
+
+# Ordem dos grupos de proximidade social
+_RELATION_ORDER = {"friend": 0, "mutual": 1, "following": 2, "other": 3}
+
+def _text_matches(db: Session, query: str, viewer_id: int) -> List[int]:
+    if user_search_index.ready:
+        return user_search_index.search(query, limit=USER_SEARCH_MAX_RESULTS, exclude=[viewer_id])
+
+    # Índice ainda carregando (logo após o start): busca direta no banco
+    rows = db.query(User.id).filter(
+        User.is_active == True,
+        User.id != viewer_id,
+        (User.first_name.ilike(f"%{query}%") | User.last_name.ilike(f"%{query}%") | User.email.ilike(f"%{query}%"))
+    ).limit(USER_SEARCH_MAX_RESULTS).all()
+    return [row[0] for row in rows]
+
+def ranked_search(db: Session, viewer_id: int, query: str) -> List[Tuple[int, str, int]]:
+    """Text matches re-ranked by social proximity to the viewer.
+
+    Returns (user_id, relation, mutual_friends) tuples: friends first, then
+    people with mutual friends (most mutuals first), then people the viewer
+    follows, then everyone else; text relevance breaks ties in each group.
+    """
+    key = (viewer_id, " ".join(tokenize(normalize(query))))
+    cached = _ranked_cache.get(key)
+    if cached is not None:
+        return cached
+
+    matches = _text_matches(db, query, viewer_id)
+    if not matches:
+        _ranked_cache.set(key, [])
+        return []
+
+    friends = friend_ids(db, viewer_id)
+    others = [user_id for user_id in matches if user_id not in friends]
+    mutuals = mutual_counts(db, viewer_id, others)
+    following = {
+        row[0] for row in db.query(Follow.followed_id).filter(
+            Follow.follower_id == viewer_id,
+            Follow.followed_id.in_(matches)
+        ).all()
+    }
+
+    ranked = []
+    for position, user_id in enumerate(matches):
+        mutual = mutuals.get(user_id, 0)
+        if user_id in friends:
+            relation = "friend"
+        elif mutual:
+            relation = "mutual"
+        elif user_id in following:
+            relation = "following"
+        else:
+            relation = "other"
+        ranked.append((_RELATION_ORDER[relation], -mutual, position, user_id, relation))
+    ranked.sort()
+
+    result = [(user_id, relation, -negative_mutual) for _, negative_mutual, _, user_id, relation in ranked]
+    _ranked_cache.set(key, result)
+    return result
+
+def refresh_user_search_index():
+    """Build the index on first run, then apply users changed since the last run.
+
+    The delta covers registrations and profile changes made by other worker
+    processes; changes made in this process are applied immediately.
+    """
+    db = SessionLocal()
+    try:
+        started_at = datetime.utcnow()
+        columns = (User.id, User.first_name, User.last_name, User.email, User.username)
+
+        if not user_search_index.ready:
+            rows = db.query(*columns).filter(User.is_active == True).yield_per(10000)
+            user_search_index.build(rows, watermark=started_at)
+            print(f"🔎 Índice de busca de usuários carregado ({len(user_search_index)} usuários)")
+            return
+
+        since = user_search_index.watermark - timedelta(seconds=5)
+        changed = db.query(*columns, User.is_active).filter(
+            (User.updated_at >= since) | (User.id > user_search_index.max_user_id)
+        ).all()
+        for row in changed:
+            if row.is_active:
+                user_search_index.upsert(row.id, row.first_name, row.last_name, row.email, row.username)
+            else:
+                user_search_index.remove(row.id)
+        user_search_index.watermark = started_at
+    finally:
+        db.close()
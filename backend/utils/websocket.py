@@ -5,6 +5,9 @@ import json
 from typing import Dict, List
 from fastapi import WebSocket
 
+from utils.blocks import is_blocked
+from utils.presence import presence
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[int, List[WebSocket]] = {}
@@ -14,21 +17,28 @@ class ConnectionManager:
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
+        presence.connected(user_id)
 
     def disconnect(self, websocket: WebSocket, user_id: int):
         if user_id in self.active_connections:
             if websocket in self.active_connections[user_id]:
                 self.active_connections[user_id].remove(websocket)
+                presence.disconnected(user_id)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
 
+    def heartbeat(self, user_id: int):
+        """Client ping over an open connection"""
+        presence.touch(user_id)
+
     async def send_personal_message(self, message: str, user_id: int):
         if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
+            # Copia: conexões quebradas saem da lista durante o envio
+            for connection in list(self.active_connections[user_id]):
                 try:
                     await connection.send_text(message)
                 except:
-                    self.active_connections[user_id].remove(connection)
+                    self.disconnect(connection, user_id)
 
     async def send_notification(self, user_id: int, notification: dict):
         message = json.dumps({
@@ -46,7 +56,9 @@ class ConnectionManager:
         await self.send_personal_message(message, user_id)
 
     async def send_typing_indicator(self, user_id: int, typing_data: dict):
-        """Send typing indicator"""
+        """Send typing indicator; dropped across a block (relayed from /ws)"""
+        if is_blocked(None, user_id, typing_data["sender_id"]):
+            return
         message = json.dumps({
             "type": "typing",
             **typing_data
@@ -54,7 +66,9 @@ class ConnectionManager:
         await self.send_personal_message(message, user_id)
 
     async def send_message_read(self, user_id: int, read_data: dict):
-        """Notify that message was read"""
+        """Notify that message was read; dropped across a block (relayed from /ws)"""
+        if is_blocked(None, user_id, read_data["reader_id"]):
+            return
         message = json.dumps({
             "type": "message_read",
             **read_data
@@ -128,7 +128,7 @@ export function MobileStoryCreator({
       );
 
       if (response.ok) {
-        const users = await response.json();
+        const { items: users } = await response.json();
         setSearchUsers(users.slice(0, 5)); // Show max 5 users
       }
     } catch (error) {
@@ -59,7 +59,7 @@ export function UserSearch({
       );
 
       if (response.ok) {
-        const users = await response.json();
+        const { items: users } = await response.json();
         setSearchResults(
           users.filter((user: User) => user.id !== currentUserId),
         );